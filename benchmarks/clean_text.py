@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 migasfree team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Throughput of the terminal output cleaner over the apt, dpkg and
+# migasfree samples in benchmarks/corpus, compared with the former
+# chained str.replace version.
+#
+# Usage: benchmarks/clean_text.py [SIZE_MB] [CHUNK_SIZE]
+
+import os
+import sys
+import glob
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from migasfree_indicator.terminal import TerminalFilter, clean_text
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+
+
+def replace_chain(text):
+    return text.replace("\033[92m", "").replace(
+        "\033[91m", ""
+    ).replace("\033[32m", "").replace("\033[0m", "")
+
+
+def load_corpus(size):
+    _sample = ''.join(
+        open(_file, 'rb').read()
+        for _file in sorted(glob.glob(os.path.join(CORPUS_DIR, '*.log')))
+    )
+
+    return _sample * (size // len(_sample) + 1)
+
+
+def measure(name, function, data):
+    _start = time.time()
+    _result = function(data)
+    _elapsed = time.time() - _start
+
+    print('%-16s %8.1f MB/s  %6d escapes left' % (
+        name,
+        len(data) / _elapsed / 1024 / 1024,
+        _result.count('\x1b')
+    ))
+
+    return _result
+
+
+def main():
+    _size = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    _chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else 64 * 1024
+
+    _data = load_corpus(_size * 1024 * 1024)
+    _lines = _data.splitlines(True)
+
+    def per_line(data):
+        return ''.join(replace_chain(_line) for _line in _lines)
+
+    def whole(data):
+        return clean_text(data)
+
+    def chunked(data):
+        _filter = TerminalFilter()
+        _result = [
+            _filter.feed(data[_offset:_offset + _chunk_size])
+            for _offset in range(0, len(data), _chunk_size)
+        ]
+        _result.append(_filter.flush())
+
+        return ''.join(_result)
+
+    print('%d MB, %d lines, %d bytes chunks' % (_size, len(_lines), _chunk_size))
+    measure('replace (lines)', per_line, _data)
+    _whole = measure('clean_text', whole, _data)
+    _chunked = measure('TerminalFilter', chunked, _data)
+
+    if _whole != _chunked:
+        print('chunked output differs from whole output')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
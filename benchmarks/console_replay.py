@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 migasfree team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Replays an upgrade log through the console output pipeline and reports
+# how long the GTK main loop stays blocked.
+#
+# Usage: benchmarks/console_replay.py [--per-line] [LOG_FILE]
+# Without LOG_FILE a 100k lines apt-like log is generated.
+# Without a display, run it under xvfb-run.
+
+import os
+import sys
+import time
+import threading
+import optparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gi import require_version
+require_version('Gtk', '3.0')
+
+from gi.repository import GObject, Gtk
+
+from migasfree_indicator.console import Console
+from migasfree_indicator.output import OutputBuffer
+
+HEARTBEAT = 10  # milliseconds
+
+
+def synthetic_log(lines=100000):
+    _log = []
+    for i in range(lines):
+        if i % 3 == 0:
+            _log.append('Get:%d http://localhost/repo stable/main amd64 '
+                        'package-%d 1.0-%d [%d kB]\n' % (i, i, i, i % 997))
+        elif i % 3 == 1:
+            _log.append('Unpacking package-%d (1.0-%d) over (0.9-%d) ...\n'
+                        % (i, i, i))
+        else:
+            _log.append('\033[92mSetting up package-%d (1.0-%d) ...\033[0m\n'
+                        % (i, i))
+
+    return _log
+
+
+class Replay(object):
+    def __init__(self, lines, per_line=False):
+        self.lines = lines
+        self.per_line = per_line
+        self.expected = sum(len(_line) for _line in lines)
+
+        self.console = Console()
+        self.output = OutputBuffer(self.sink)
+
+        self.received = 0
+        self.callbacks = 0
+        self.blocked = 0.0
+        self.max_block = 0.0
+        self.max_lateness = 0.0
+        self._last_beat = None
+
+    def sink(self, text):
+        _start = time.time()
+
+        _iterator = self.console.textbuffer.get_end_iter()
+        self.console.textbuffer.place_cursor(_iterator)
+        self.console.textbuffer.insert(_iterator, text)
+        self.console.textview.scroll_to_mark(
+            self.console.textbuffer.get_insert(),
+            0.1, False, 0, 0
+        )
+
+        _elapsed = time.time() - _start
+        self.blocked += _elapsed
+        self.max_block = max(self.max_block, _elapsed)
+        self.callbacks += 1
+        self.received += len(text)
+
+        if self.received >= self.expected:
+            Gtk.main_quit()
+
+        return False
+
+    def heartbeat(self):
+        _now = time.time()
+        if self._last_beat is not None:
+            _lateness = _now - self._last_beat - HEARTBEAT / 1000.0
+            self.max_lateness = max(self.max_lateness, _lateness)
+        self._last_beat = _now
+
+        return True
+
+    def feed(self):
+        for _line in self.lines:
+            if self.per_line:
+                GObject.idle_add(self.sink, _line)
+            else:
+                self.output.write(_line)
+
+        self.output.flush()
+
+    def run(self):
+        self.console.show_all()
+        GObject.timeout_add(HEARTBEAT, self.heartbeat)
+
+        _thread = threading.Thread(target=self.feed)
+        _thread.setDaemon(True)
+
+        _start = time.time()
+        _thread.start()
+        Gtk.main()
+
+        return time.time() - _start
+
+
+def main():
+    parser = optparse.OptionParser(usage='%prog [--per-line] [LOG_FILE]')
+    parser.add_option(
+        '--per-line',
+        action='store_true',
+        default=False,
+        help='one main loop callback per line (previous behaviour)'
+    )
+    options, arguments = parser.parse_args()
+
+    if arguments:
+        with open(arguments[0]) as _handle:
+            _lines = _handle.readlines()
+    else:
+        _lines = synthetic_log()
+
+    GObject.threads_init()
+    _replay = Replay(_lines, per_line=options.per_line)
+    _wall = _replay.run()
+
+    print('mode:              %s' % ('per-line' if options.per_line else 'batched'))
+    print('lines:             %d' % len(_lines))
+    print('bytes:             %d' % _replay.expected)
+    print('callbacks:         %d' % _replay.callbacks)
+    print('wall time:         %.3f s' % _wall)
+    print('main loop blocked: %.3f s' % _replay.blocked)
+    print('longest block:     %.1f ms' % (_replay.max_block * 1000))
+    print('worst stall:       %.1f ms' % (_replay.max_lateness * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 migasfree team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+
+# Cost of turning the launcher output into UTF-8 for the console: the former
+# per line path (locale lookup, lambda, unicode() and encode() for every
+# line) against one TextDecoder per run fed with read sized chunks.
+# The log mixes UTF-8, Latin-1 and ASCII lines, as found on hosts where the
+# hooks and the package manager run with different locales.
+#
+# Usage: benchmarks/decode.py [SIZE_MB] [CHUNK_SIZE]
+
+import os
+import sys
+import time
+import locale
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from migasfree_indicator.terminal import TextDecoder
+
+SAMPLE_LINES = [
+    'Get:1 http://deb.example.org stable/main amd64 libc6 2.24-11 [2,694 kB]\n',
+    u'Configurando paquetes: configuración regional española ñ ü\n'.encode('utf-8'),
+    u'Téléchargement des métadonnées terminé\n'.encode('latin-1'),
+    u'Синхронизация завершена 100%\n'.encode('utf-8'),
+    'Unpacking libssl1.1:amd64 (1.1.0f-3) over (1.1.0e-2) ...\n',
+]
+
+
+def load_log(size):
+    _sample = ''.join(SAMPLE_LINES)
+
+    return _sample * (size // len(_sample) + 1)
+
+
+def per_line(data):
+    _result = []
+    _errors = 0
+    for _line in data.splitlines(True):
+        _encoding = locale.getpreferredencoding()
+        _utf8conv = lambda x: unicode(x, _encoding).encode('utf8')
+        try:
+            _result.append(_utf8conv(_line))
+        except UnicodeDecodeError:
+            _errors += 1
+
+    return ''.join(_result), _errors
+
+
+def incremental(data, chunk_size):
+    _decoder = TextDecoder()
+    _result = [
+        _decoder.feed(data[_offset:_offset + chunk_size])
+        for _offset in range(0, len(data), chunk_size)
+    ]
+    _result.append(_decoder.feed('', final=True))
+
+    return ''.join(_result), 0
+
+
+def measure(name, function, *args):
+    _start = time.time()
+    _result, _errors = function(*args)
+    _elapsed = time.time() - _start
+
+    print('%-12s %8.1f MB/s  %8d lines lost' % (
+        name,
+        len(args[0]) / _elapsed / 1024 / 1024,
+        _errors
+    ))
+
+    return _result
+
+
+def main():
+    locale.setlocale(locale.LC_ALL, '')
+
+    _size = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    _chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else 64 * 1024
+
+    _data = load_log(_size * 1024 * 1024)
+
+    print('%d MB, %s locale, %d bytes chunks' % (
+        _size, locale.getpreferredencoding(), _chunk_size
+    ))
+    measure('per line', per_line, _data)
+    _chunked = measure('TextDecoder', incremental, _data, _chunk_size)
+    _whole, _ = incremental(_data, len(_data))
+
+    if _chunked != _whole:
+        print('chunked output differs from whole output')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
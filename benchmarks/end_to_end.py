@@ -0,0 +1,288 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 migasfree team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# End to end indicator benchmark: the sync engine runs fake_launcher.py
+# as its custom command, through the same runner, terminal filter,
+# decoder and output batching as a real sync and, with --gui, into the
+# console window. Every scenario runs in a fresh interpreter and reports
+# lines per second, main loop stalls, peak RSS and CPU time, compared
+# with a stored baseline (exit code 1 on regression, or for a scenario
+# without baseline: store one with --save-baseline on the reference
+# machine).
+#
+# Needs no network. Without a display, run it as is (headless) or with
+# --gui under xvfb-run.
+#
+# Usage: benchmarks/end_to_end.py [--gui] [--save-baseline] [SCENARIO...]
+
+import os
+import sys
+import json
+import time
+import shutil
+import resource
+import tempfile
+import optparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+FAKE_LAUNCHER = os.path.join(ROOT, 'benchmarks', 'fake_launcher.py')
+BASELINE_FILE = os.path.join(ROOT, 'benchmarks', 'end_to_end.baseline.json')
+
+HEARTBEAT = 10  # milliseconds
+
+# name: fake launcher arguments
+SCENARIOS = {
+    'apt': ['--lines', '50000', '--length', '80', '--escapes', '0.1'],
+    'progress': ['--lines', '50000', '--length', '60', '--escapes', '1'],
+    'long-lines': ['--lines', '2000', '--length', '4000', '--escapes', '0'],
+    'paced': ['--lines', '3000', '--rate', '1000', '--escapes', '0.5'],
+    'failure': ['--lines', '5000', '--exit-code', '1'],
+}
+
+# metric: (format, higher is better)
+METRICS = (
+    ('lines_per_second', '%10.0f', True),
+    ('stall_max', '%8.1f ms', False),
+    ('stall_total', '%8.1f ms', False),
+    ('rss_kb', '%8d kB', False),
+    ('cpu', '%8.2f s', False),
+)
+
+# absolute noise allowed on top of the tolerance, for small values
+SLACK = {
+    'stall_max': 5.0,  # milliseconds
+    'stall_total': 20.0,  # milliseconds
+    'cpu': 0.05,  # seconds
+}
+
+
+def argument(arguments, name, default=0):
+    if name in arguments:
+        return int(arguments[arguments.index(name) + 1])
+
+    return default
+
+
+def launcher_lines(arguments):
+    # the fake launcher lines, plus its three markers and final separator
+    return argument(arguments, '--lines') + 4
+
+
+def measure(name, gui):
+    # runs in the child: the whole pipeline, as the indicator does
+    from gi.repository import GLib
+
+    from migasfree_indicator.engine import SyncEngine
+    from migasfree_indicator.settings import Settings
+
+    _arguments = SCENARIOS[name]
+    _result = {'lines': 0, 'stall_max': 0.0, 'stall_total': 0.0}
+    _loop = GLib.MainLoop()
+
+    _engine = SyncEngine(Settings(optparse.Values()))
+    _engine.custom_command = ' '.join(
+        [sys.executable, FAKE_LAUNCHER] + _arguments
+    )
+
+    if gui:
+        from gi import require_version
+        require_version('Gtk', '3.0')
+
+        from migasfree_indicator.console import Console
+
+        _console = Console()
+        _console.show_all()
+        _engine.connect('output', lambda _, text: _console.append(text))
+        _engine.connect(
+            'progress',
+            lambda _, fraction, label: _console.set_progress(fraction, label)
+        )
+
+    def on_output(engine, text):
+        _result['lines'] += text.count('\n')
+
+    def on_started(engine, command):
+        _result['start'] = time.time()
+
+    def on_finished(engine, return_code):
+        _result['wall'] = time.time() - _result.pop('start')
+        _result['exit_code'] = return_code
+        _loop.quit()
+
+    _beats = [None]
+
+    def heartbeat():
+        _now = time.time()
+        if _beats[0] is not None:
+            _lateness = (_now - _beats[0]) * 1000 - HEARTBEAT
+            if _lateness > 0:
+                _result['stall_max'] = max(_result['stall_max'], _lateness)
+                _result['stall_total'] += _lateness
+        _beats[0] = _now
+
+        return True
+
+    _engine.connect('output', on_output)
+    _engine.connect('started', on_started)
+    _engine.connect('finished', on_finished)
+
+    GLib.timeout_add(HEARTBEAT, heartbeat)
+    GLib.idle_add(_engine.update_system)
+
+    _times = os.times()
+    _loop.run()
+    _cpu = sum(os.times()[:2]) - sum(_times[:2])
+
+    _result['lines_per_second'] = launcher_lines(_arguments) / _result['wall']
+    _result['cpu'] = _cpu
+    _result['rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return _result
+
+
+def run_child(name, gui):
+    # fresh interpreter: peak RSS and CPU time of this scenario only, and
+    # a private cache dir for the run history and the last sync
+    _cache = tempfile.mkdtemp(prefix='migasfree-e2e-')
+    _env = dict(os.environ, XDG_CACHE_HOME=_cache)
+    _command = [sys.executable, os.path.abspath(__file__), '--child', name]
+    if gui:
+        _command.append('--gui')
+
+    try:
+        _output = subprocess.check_output(_command, env=_env, cwd=ROOT)
+    finally:
+        shutil.rmtree(_cache, ignore_errors=True)
+
+    return json.loads(_output.splitlines()[-1])
+
+
+def is_regression(metric, value, baseline, higher_is_better, tolerance):
+    if higher_is_better:
+        return value < baseline * (1 - tolerance)
+
+    return value > baseline * (1 + tolerance) + SLACK.get(metric, 0)
+
+
+def report(name, result, baseline, tolerance, required=True):
+    # returns the failed checks of a scenario; required: a missing
+    # baseline fails too, instead of passing with nothing compared
+    _failures = []
+
+    _expected = launcher_lines(SCENARIOS[name])
+    if result['lines'] < _expected:
+        _failures.append('%d of %d lines' % (result['lines'], _expected))
+
+    if result['exit_code'] != argument(SCENARIOS[name], '--exit-code'):
+        _failures.append('exit code %d' % result['exit_code'])
+
+    print('%s (%.2f s, %d lines)' % (name, result['wall'], result['lines']))
+    for _metric, _format, _higher in METRICS:
+        _line = '  %-17s ' % _metric + _format % result[_metric]
+        if _metric in baseline:
+            _line += ('  baseline ' + _format) % baseline[_metric]
+            if is_regression(_metric, result[_metric], baseline[_metric],
+                             _higher, tolerance):
+                _line += '  REGRESSION'
+                _failures.append(_metric)
+        print(_line)
+
+    if required and not baseline:
+        _failures.append('no baseline (store one with --save-baseline)')
+
+    if _failures:
+        print('  failed: %s' % ', '.join(_failures))
+
+    return _failures
+
+
+def main():
+    parser = optparse.OptionParser(usage='%prog [options] [SCENARIO...]')
+    parser.add_option(
+        '--gui',
+        action='store_true',
+        default=False,
+        help='show the output in the console window (needs a display)'
+    )
+    parser.add_option(
+        '--baseline',
+        default=BASELINE_FILE,
+        help='baseline file (default: %default)'
+    )
+    parser.add_option(
+        '--save-baseline',
+        action='store_true',
+        default=False,
+        help='store these results as the new baseline'
+    )
+    parser.add_option(
+        '--tolerance',
+        type='float',
+        default=0.25,
+        help='allowed relative change before failing (default: %default)'
+    )
+    parser.add_option('--child', help=optparse.SUPPRESS_HELP)
+    options, arguments = parser.parse_args()
+
+    if options.child:
+        print(json.dumps(measure(options.child, options.gui)))
+        return
+
+    for _name in arguments:
+        if _name not in SCENARIOS:
+            parser.error('unknown scenario %s (%s)' % (
+                _name, ', '.join(sorted(SCENARIOS))
+            ))
+
+    try:
+        with open(options.baseline) as _handle:
+            _baselines = json.load(_handle)
+    except (IOError, ValueError):
+        _baselines = {}
+
+    _mode = 'gui' if options.gui else 'headless'
+    _failed = False
+    for _name in arguments or sorted(SCENARIOS):
+        _key = '%s/%s' % (_mode, _name)
+        _result = run_child(_name, options.gui)
+        _failures = report(
+            _name, _result, _baselines.get(_key, {}), options.tolerance,
+            required=not options.save_baseline
+        )
+        _failed = _failed or bool(_failures)
+
+        _baselines[_key] = dict(
+            (_metric, _result[_metric]) for _metric, _, _ in METRICS
+        )
+
+    if options.save_baseline:
+        with open(options.baseline, 'w') as _handle:
+            json.dump(_baselines, _handle, indent=4, sort_keys=True)
+            _handle.write('\n')
+        print('baseline saved to %s' % options.baseline)
+
+    if _failed:
+        print('FAILED')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
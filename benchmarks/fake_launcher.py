@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 migasfree team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Stand-in for bin/migasfree-launcher: prints the launcher phase markers
+# and apt/dpkg like lines at a given rate, with a share of them carrying
+# colours, line erasing and dpkg progress redraws, then exits with the
+# given code. Needs no network, no root and no migasfree client.
+#
+# Usage: benchmarks/fake_launcher.py [--lines N] [--rate LINES_PER_SECOND]
+#        [--length CHARACTERS] [--escapes FRACTION] [--exit-code N]
+
+import os
+import sys
+import time
+import optparse
+
+SEPARATOR = '-' * 32 + '\n'
+WRITE_SIZE = 64 * 1024  # bytes, when not rate limited
+
+
+def make_line(index, length, decorated, total):
+    _text = 'Get:%d http://localhost/repo stable/main amd64 package-%d' % (
+        index, index
+    )
+    _text = (_text + ' ' + 'x' * length)[:max(length, 1)]
+
+    if not decorated:
+        return _text + '\n'
+
+    # what apt and dpkg draw on a terminal
+    _percent = index * 100 // max(total, 1)
+    return '\033[2K\rProgress: [%3d%%] \033[1;32m%s\033[0m\n' % (
+        _percent, _text
+    )
+
+
+def main():
+    parser = optparse.OptionParser(usage='%prog [options] [JOB]')
+    parser.add_option('--lines', type='int', default=10000)
+    parser.add_option(
+        '--rate',
+        type='float',
+        default=0,
+        help='lines per second, 0: as fast as possible'
+    )
+    parser.add_option('--length', type='int', default=80)
+    parser.add_option(
+        '--escapes',
+        type='float',
+        default=0.1,
+        help='fraction of lines with control sequences (0 to 1)'
+    )
+    parser.add_option('--exit-code', type='int', default=0)
+    options, _ = parser.parse_args()
+
+    _fd = sys.stdout.fileno()
+    os.write(_fd, 'Report tags: ...\nSynchronizing...\n' + SEPARATOR)
+
+    _start = time.time()
+    _pending = []
+    _size = 0
+    _decorated = 0.0
+    for _index in range(options.lines):
+        # evenly spread, whatever the fraction
+        _decorated += options.escapes
+        _line = make_line(
+            _index, options.length, _decorated >= 1, options.lines
+        )
+        if _decorated >= 1:
+            _decorated -= 1
+
+        if options.rate:
+            _delay = _start + _index / options.rate - time.time()
+            if _delay > 0:
+                time.sleep(_delay)
+            os.write(_fd, _line)
+            continue
+
+        _pending.append(_line)
+        _size += len(_line)
+        if _size >= WRITE_SIZE:
+            os.write(_fd, ''.join(_pending))
+            _pending = []
+            _size = 0
+
+    os.write(_fd, ''.join(_pending) + SEPARATOR)
+
+    sys.exit(options.exit_code)
+
+
+if __name__ == '__main__':
+    main()
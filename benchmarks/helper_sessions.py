@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 migasfree team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+
+# Many sessions asking migasfree-launcher-helper for a sync at the same
+# time (terminal servers): starts a helper on a private socket with a fake
+# launcher, connects N clients at once, some of them late, and checks
+# that the launcher ran once per needed run, that every client got the
+# whole output and the same exit code, and how long the clients waited.
+#
+# Usage: benchmarks/helper_sessions.py [--clients N] [--forced N] ...
+
+import os
+import sys
+import time
+import select
+import shutil
+import tempfile
+import optparse
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from migasfree_indicator.helper import HelperServer, HelperJob
+
+FAKE_LAUNCHER = '''#!/bin/sh
+echo "${1:-upgrade}" >> "%(runs)s"
+i=0
+while [ $i -lt %(lines)d ]
+do
+    echo "line $i of the ${1:-upgrade} run"
+    i=$((i + 1))
+    sleep %(delay)s
+done
+exit %(exit_code)d
+'''
+
+
+class Cache(object):
+    # the helper reads these from the migasfree client configuration
+    def server(self):
+        return 'localhost'
+
+    def graphic_user(self):
+        return ''
+
+
+def client(path, job, delay, results):
+    time.sleep(delay)
+    _start = time.time()
+    _job = HelperJob(job, path)
+
+    _output = []
+    while not _job.eof:
+        select.select([_job.fileno()], [], [])
+        _output.append(_job.read())
+
+    results.append((job, ''.join(_output), _job.close(), time.time() - _start))
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('--clients', type='int', default=40)
+    parser.add_option('--forced', type='int', default=2, help='force-upgrade clients')
+    parser.add_option('--lines', type='int', default=50)
+    parser.add_option('--delay', type='float', default=0.02, help='seconds per line')
+    parser.add_option('--spread', type='float', default=0.5, help='seconds')
+    parser.add_option('--exit-code', type='int', default=0)
+    options, arguments = parser.parse_args()
+
+    _dir = tempfile.mkdtemp()
+    _runs = os.path.join(_dir, 'runs')
+    _launcher = os.path.join(_dir, 'migasfree-launcher')
+    with open(_launcher, 'w') as _handle:
+        _handle.write(FAKE_LAUNCHER % {
+            'runs': _runs,
+            'lines': options.lines,
+            'delay': options.delay,
+            'exit_code': options.exit_code,
+        })
+    os.chmod(_launcher, 0o755)
+
+    _path = os.path.join(_dir, 'helper.sock')
+    _server = HelperServer(_path, launcher=_launcher)
+    _server.cache = Cache()
+    _thread = threading.Thread(target=_server.serve_forever)
+    _thread.setDaemon(True)
+    _thread.start()
+
+    _results = []
+    _clients = []
+    for _index in range(options.clients):
+        if _index >= options.clients - options.forced:
+            _job = 'force-upgrade'
+        else:
+            _job = 'upgrade'
+        _delay = options.spread * _index / max(1, options.clients - 1)
+        _clients.append(threading.Thread(
+            target=client,
+            args=(_path, _job, _delay, _results)
+        ))
+
+    _start = time.time()
+    for _client in _clients:
+        _client.start()
+    for _client in _clients:
+        _client.join()
+    _elapsed = time.time() - _start
+
+    _server.shutdown()
+    with open(_runs) as _handle:
+        _launches = _handle.read().split()
+    shutil.rmtree(_dir)
+
+    _outputs = {}
+    for _job, _output, _returncode, _ in _results:
+        _outputs.setdefault(_job, set()).add((_output, _returncode))
+    _waits = sorted(_result[3] for _result in _results)
+
+    print('%d clients (%d forced), %d launcher runs in %.2f s' % (
+        options.clients, options.forced, len(_launches), _elapsed
+    ))
+    print('client wait: min %.2f s, median %.2f s, max %.2f s' % (
+        _waits[0], _waits[len(_waits) // 2], _waits[-1]
+    ))
+
+    _failed = False
+    for _job, _answers in sorted(_outputs.items()):
+        _complete = all(
+            _output.count(' run\n') == options.lines
+            and _returncode == options.exit_code
+            for _output, _returncode in _answers
+        )
+        print('%-14s %d distinct answers, complete: %s' % (
+            _job, len(_answers), _complete
+        ))
+        _failed = _failed or not _complete or len(_answers) != 1
+
+    # a forced request may start one more run, never one per client
+    if _failed or len(_launches) > 1 + min(1, options.forced):
+        print('FAILED')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
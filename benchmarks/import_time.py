@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 migasfree team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Import time regression check: imports a module in fresh interpreters,
+# prints an "-X importtime" like breakdown (microseconds, self and
+# cumulative) of the fastest run and exits with 1 when it is over budget.
+#
+# Usage: benchmarks/import_time.py [--budget SECONDS] [--runs N] [MODULE]
+
+import os
+import sys
+import optparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r'''
+import sys
+import time
+import __builtin__
+
+_import = __builtin__.__import__
+_stack = [0.0]
+_rows = []
+
+
+def timed_import(name, globals=None, locals=None, fromlist=None, level=-1):
+    if name in sys.modules:
+        return _import(name, globals, locals, fromlist, level)
+
+    _stack.append(0.0)
+    _start = time.time()
+    try:
+        return _import(name, globals, locals, fromlist, level)
+    finally:
+        _elapsed = time.time() - _start
+        _nested = _stack.pop()
+        _stack[-1] += _elapsed
+        _rows.append((len(_stack), name or '.', _elapsed - _nested, _elapsed))
+
+__builtin__.__import__ = timed_import
+_start = time.time()
+import %s
+_total = time.time() - _start
+__builtin__.__import__ = _import
+
+for _depth, _name, _self, _cumulative in _rows:
+    print('%%9d | %%9d | %%s%%s' %% (
+        _self * 1e6, _cumulative * 1e6, '  ' * (_depth - 1), _name
+    ))
+print('total %%.6f' %% _total)
+'''
+
+
+def run(module):
+    _output = subprocess.check_output(
+        [sys.executable, '-c', CHILD % module],
+        cwd=ROOT
+    ).splitlines()
+
+    return float(_output[-1].split()[1]), _output[:-1]
+
+
+def main():
+    parser = optparse.OptionParser(usage='%prog [options] [MODULE]')
+    parser.add_option('--budget', type='float', default=0.5)
+    parser.add_option('--runs', type='int', default=5)
+    options, arguments = parser.parse_args()
+
+    _module = arguments[0] if arguments else 'migasfree_indicator.indicator'
+    _best, _rows = min(run(_module) for _ in range(options.runs))
+
+    print('  self [us] | cumulative | imported package')
+    for _row in _rows:
+        print(_row)
+    print('%s: %.3f s (budget %.3f s)' % (_module, _best, options.budget))
+
+    if _best > options.budget:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 migasfree team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# NetworkWatcher driven by a fake network monitor and a fake gateway:
+# no route at start, "network-changed" still without a route, then a
+# route (on_ready is called once, the monitor handler is disconnected
+# and later changes are ignored), a route at start, and no route until
+# the timeout (on_timeout is called once, on_ready never). Reports the
+# gateway lookups of every case.
+#
+# Usage: benchmarks/network_watcher.py
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gi.repository import GLib
+
+from migasfree_indicator.network import NetworkWatcher
+
+TIMEOUT = 1  # seconds, the shortest NetworkWatcher accepts
+WAIT = 3000  # milliseconds, before giving up on the timeout case
+
+
+# stands in for Gio.NetworkMonitor: one "network-changed" handler
+class FakeMonitor(object):
+    def __init__(self):
+        self.handlers = {}
+        self._next_id = 1
+
+    def connect(self, signal, callback):
+        _handler_id = self._next_id
+        self._next_id += 1
+        self.handlers[_handler_id] = (signal, callback)
+
+        return _handler_id
+
+    def disconnect(self, handler_id):
+        del self.handlers[handler_id]
+
+    def emit(self, available):
+        for _signal, _callback in list(self.handlers.values()):
+            if _signal == 'network-changed':
+                _callback(self, available)
+
+
+# stands in for get_gateway: the route, if any, and the lookups made
+class FakeGateway(object):
+    def __init__(self, route=None):
+        self.route = route
+        self.lookups = 0
+
+    def __call__(self):
+        self.lookups += 1
+
+        return self.route
+
+
+class Case(object):
+    def __init__(self, route=None, loop=None):
+        self.ready = []
+        self.expired = 0
+        self.loop = loop
+        self.monitor = FakeMonitor()
+        self.gateway = FakeGateway(route)
+        self.watcher = NetworkWatcher(
+            self.ready.append,
+            self.on_timeout if loop else None,
+            TIMEOUT,
+            self.monitor,
+            self.gateway
+        )
+
+    def on_timeout(self):
+        self.expired += 1
+        self.loop.quit()
+
+
+def route_comes_up():
+    _case = Case()
+    _case.watcher.start()
+    _problems = []
+    if not _case.monitor.handlers:
+        _problems.append('not listening to the monitor')
+
+    _case.monitor.emit(True)  # an address, still no default route
+    _case.monitor.emit(False)
+    if _case.ready:
+        _problems.append('ready without a route')
+
+    _case.gateway.route = '192.168.1.1'
+    _case.monitor.emit(True)
+    _case.monitor.emit(True)  # already disconnected, must not count
+    _case.watcher.check()
+
+    if len(_case.ready) != 1:
+        _problems.append('on_ready called %d times' % len(_case.ready))
+    if _case.monitor.handlers:
+        _problems.append('monitor handler left connected')
+
+    return _case.gateway.lookups, _problems
+
+
+def route_at_start():
+    _case = Case(route='192.168.1.1')
+    _case.watcher.start()
+    _problems = []
+    if len(_case.ready) != 1:
+        _problems.append('on_ready called %d times' % len(_case.ready))
+    if _case.monitor.handlers:
+        _problems.append('listening to the monitor with a route')
+
+    return _case.gateway.lookups, _problems
+
+
+def timeout():
+    _loop = GLib.MainLoop()
+    _case = Case(loop=_loop)
+    _case.watcher.start()
+    _case.monitor.emit(True)  # no route yet
+
+    _timer = {}
+
+    def on_timer():
+        _timer.clear()
+        _loop.quit()
+
+        return False
+
+    _timer['id'] = GLib.timeout_add(WAIT, on_timer)
+    _loop.run()
+    if _timer:
+        GLib.source_remove(_timer['id'])
+
+    _problems = []
+    if _case.expired != 1:
+        _problems.append('on_timeout called %d times' % _case.expired)
+    if _case.ready:
+        _problems.append('ready without a route')
+    _case.watcher.stop()
+    if _case.monitor.handlers:
+        _problems.append('monitor handler left connected')
+
+    return _case.gateway.lookups, _problems
+
+
+CASES = (
+    ('route comes up', route_comes_up),
+    ('route at start', route_at_start),
+    ('timeout', timeout),
+)
+
+
+def main():
+    _failed = False
+    for _name, _function in CASES:
+        _lookups, _problems = _function()
+        print('%-15s %s: %d gateway lookups%s' % (
+            _name, 'FAILED' if _problems else 'ok', _lookups,
+            ''.join(', %s' % _problem for _problem in _problems)
+        ))
+        _failed = _failed or bool(_problems)
+
+    if _failed:
+        print('FAILED')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 migasfree team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# The launcher preflight against a local HTTP stand-in for the server,
+# which versions its answer with an ETag, a Last-Modified date or only
+# its content: walks through the check/commit sequence of a machine
+# (first sync, nothing new, server change, failed sync, maximum age,
+# server down) and reports how many syncs were skipped, the requests
+# made and the time of a check.
+#
+# Usage: benchmarks/preflight.py
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import threading
+import BaseHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from migasfree_indicator.preflight import check, commit
+
+MODES = ('etag', 'modified', 'content')
+
+
+class StandInHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    def do_GET(self):
+        _server = self.server
+        _server.requests += 1
+        _etag = '"v%d"' % _server.version
+        _modified = self.date_time_string(1500000000 + _server.version)
+
+        if _server.mode == 'etag' \
+                and self.headers.getheader('If-None-Match') == _etag:
+            _server.not_modified += 1
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        if _server.mode == 'modified' \
+                and self.headers.getheader('If-Modified-Since') == _modified:
+            _server.not_modified += 1
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        _body = 'version %d\n' % _server.version
+        self.send_response(200)
+        if _server.mode == 'etag':
+            self.send_header('ETag', _etag)
+        elif _server.mode == 'modified':
+            self.send_header('Last-Modified', _modified)
+        self.send_header('Content-Length', str(len(_body)))
+        self.end_headers()
+        self.wfile.write(_body)
+
+    def log_message(self, *args):
+        pass
+
+
+def stand_in(mode):
+    _server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), StandInHandler)
+    _server.mode = mode
+    _server.version = 1
+    _server.requests = 0
+    _server.not_modified = 0
+
+    _thread = threading.Thread(target=_server.serve_forever)
+    _thread.setDaemon(True)
+    _thread.start()
+
+    return _server
+
+
+def walk(mode, state):
+    # (step, sync expected to be skipped) for one machine
+    _server = stand_in(mode)
+    _address = '127.0.0.1:%d' % _server.server_address[1]
+    _options = {
+        'preflight_url': 'http://%(server)s/version',
+        'preflight_max_age': 168,
+        'preflight_timeout': 5,
+    }
+
+    def step(name, expected, succeeded=True):
+        _start = time.time()
+        _skipped = check(_address, _options, state)
+        _elapsed = time.time() - _start
+        if not _skipped and succeeded:
+            commit(state)
+
+        return name, expected, _skipped, _elapsed
+
+    _steps = [step('first sync', False)]
+    _steps.extend(step('nothing new', True) for _ in range(8))
+
+    _server.version += 1
+    _steps.append(step('server changed, sync failed', False, False))
+    _steps.append(step('retry after failure', False))
+    _steps.append(step('nothing new', True))
+
+    _options['preflight_max_age'] = 0
+    _steps.append(step('maximum age', False))
+    _options['preflight_max_age'] = 168
+
+    _options['preflight_url'] = ''
+    _steps.append(step('disabled', False))
+
+    _options['preflight_url'] = 'http://%(server)s/version'
+    _server.shutdown()
+    _server.server_close()
+    _steps.append(step('server down', False))
+
+    return _steps, _server.requests, _server.not_modified
+
+
+def main():
+    _failed = False
+    _directory = tempfile.mkdtemp(prefix='migasfree-preflight-')
+
+    try:
+        for _mode in MODES:
+            _state = os.path.join(_directory, '%s.json' % _mode)
+            _steps, _requests, _not_modified = walk(_mode, _state)
+
+            _skipped = sum(1 for _step in _steps if _step[2])
+            _checks = [_step[3] for _step in _steps]
+            print('%s: %d of %d syncs skipped, %d requests (%d not modified), '
+                  'check %.1f ms median' % (
+                      _mode, _skipped, len(_steps), _requests, _not_modified,
+                      sorted(_checks)[len(_checks) // 2] * 1000
+                  ))
+
+            for _name, _expected, _result, _ in _steps:
+                if _expected != _result:
+                    print('  %s: skipped %s, expected %s' % (
+                        _name, _result, _expected
+                    ))
+                    _failed = True
+    finally:
+        shutil.rmtree(_directory)
+
+    if _failed:
+        print('FAILED')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
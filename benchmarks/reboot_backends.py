@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 migasfree team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# RebootBackend against a private dbus-daemon that stands in for the
+# system bus, with fake login1 and ConsoleKit managers exported on it:
+# checks which restart method is called and with which arguments, that
+# the backend is detected once and then cached, and that failures and a
+# bus with no session manager reach on_error.
+#
+# Usage: benchmarks/reboot_backends.py (needs dbus-daemon)
+
+import os
+import sys
+import shutil
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gi.repository import Gio, GLib
+
+from migasfree_indicator.reboot import RebootBackend
+
+REPLY_WAIT = 500  # milliseconds, a successful restart answers nothing
+
+MANAGERS = {
+    'login1': (
+        'org.freedesktop.login1',
+        '/org/freedesktop/login1',
+        '''<node><interface name="org.freedesktop.login1.Manager">
+             <method name="Reboot"><arg type="b" direction="in"/></method>
+           </interface></node>''',
+    ),
+    'consolekit': (
+        'org.freedesktop.ConsoleKit',
+        '/org/freedesktop/ConsoleKit/Manager',
+        '''<node><interface name="org.freedesktop.ConsoleKit.Manager">
+             <method name="Restart"/>
+           </interface></node>''',
+    ),
+}
+
+DAEMON_CONFIG = '''<busconfig>
+  <type>session</type>
+  <listen>unix:path=%s</listen>
+  <auth>EXTERNAL</auth>
+  <policy context="default">
+    <allow send_destination="*" eavesdrop="true"/>
+    <allow eavesdrop="true"/>
+    <allow own="*"/>
+  </policy>
+</busconfig>
+'''
+
+
+def connect(address):
+    return Gio.DBusConnection.new_for_address_sync(
+        address,
+        Gio.DBusConnectionFlags.AUTHENTICATION_CLIENT
+        | Gio.DBusConnectionFlags.MESSAGE_BUS_CONNECTION,
+        None,
+        None
+    )
+
+
+def request_name(connection, name):
+    connection.call_sync(
+        'org.freedesktop.DBus', '/org/freedesktop/DBus',
+        'org.freedesktop.DBus', 'RequestName',
+        GLib.Variant('(su)', (name, 0)), GLib.VariantType.new('(u)'),
+        Gio.DBusCallFlags.NONE, -1, None
+    )
+
+
+# the session managers, on their own connection; fail: answer an error
+class FakeManagers(object):
+    def __init__(self, address, names, fail=False):
+        self.calls = []
+        self.fail = fail
+        self.connection = connect(address)
+
+        for _name in names:
+            _bus_name, _path, _xml = MANAGERS[_name]
+            self.connection.register_object(
+                _path,
+                Gio.DBusNodeInfo.new_for_xml(_xml).interfaces[0],
+                self.on_method_call,
+                None,
+                None
+            )
+            request_name(self.connection, _bus_name)
+
+    def on_method_call(self, connection, sender, path, interface, method,
+                       parameters, invocation):
+        self.calls.append((interface, method, parameters.unpack()))
+        if self.fail:
+            invocation.return_dbus_error(
+                'org.freedesktop.DBus.Error.AccessDenied', 'not allowed'
+            )
+        else:
+            invocation.return_value(None)
+
+    def close(self):
+        self.connection.close_sync(None)
+
+
+# counts the bus lookups made for the detection
+class CountingBackend(RebootBackend):
+    lookups = 0
+
+    def list_names(self, method):
+        self.lookups += 1
+
+        return super(CountingBackend, self).list_names(method)
+
+
+def reboot(backend, loop):
+    # the call is asynchronous: waits for an error or REPLY_WAIT
+    _errors = []
+    _timer = {}
+
+    def on_error(message):
+        _errors.append(message)
+        loop.quit()
+
+    def on_timer():
+        _timer.clear()
+        loop.quit()
+
+        return False
+
+    _timer['id'] = GLib.timeout_add(REPLY_WAIT, on_timer)
+    backend.reboot(on_error)
+    if not _errors:
+        loop.run()
+    if _timer:
+        GLib.source_remove(_timer['id'])
+
+    return _errors
+
+
+def scenario(address, names, fail=False):
+    _managers = FakeManagers(address, names, fail)
+    _backend = CountingBackend(connect(address))
+    _loop = GLib.MainLoop()
+
+    _errors = reboot(_backend, _loop) + reboot(_backend, _loop)
+    _result = (_managers.calls, _backend.lookups, _errors)
+
+    _backend.connection.close_sync(None)
+    _managers.close()
+
+    return _result
+
+
+def main():
+    _directory = tempfile.mkdtemp(prefix='migasfree-reboot-')
+    _config = os.path.join(_directory, 'bus.conf')
+    _socket = os.path.join(_directory, 'bus')
+    with open(_config, 'w') as _handle:
+        _handle.write(DAEMON_CONFIG % _socket)
+
+    _daemon = subprocess.Popen(
+        ['dbus-daemon', '--config-file', _config, '--nofork',
+         '--print-address'],
+        stdout=subprocess.PIPE
+    )
+    _address = _daemon.stdout.readline().strip()
+
+    _login1 = ('org.freedesktop.login1.Manager', 'Reboot', (True,))
+    _consolekit = ('org.freedesktop.ConsoleKit.Manager', 'Restart', ())
+    # name: (managers, fail, expected calls, expected errors)
+    _scenarios = (
+        ('login1', ['login1', 'consolekit'], False, [_login1] * 2, 0),
+        ('consolekit', ['consolekit'], False, [_consolekit] * 2, 0),
+        ('denied', ['login1'], True, [_login1] * 2, 2),
+        ('none', [], False, [], 2),
+    )
+
+    _failed = False
+    try:
+        for _name, _names, _fail, _calls, _errors in _scenarios:
+            _got_calls, _lookups, _got_errors = scenario(
+                _address, _names, _fail
+            )
+            # one detection (ListNames + ListActivatableNames) for two
+            # restarts, unless nothing was found
+            _ok = _got_calls == _calls and len(_got_errors) == _errors \
+                and (_lookups == 2 or not _calls)
+            print('%-11s %s: calls %s, bus lookups %d, errors %s' % (
+                _name, 'ok' if _ok else 'FAILED',
+                [_call[1] for _call in _got_calls], _lookups, _got_errors
+            ))
+            _failed = _failed or not _ok
+    finally:
+        _daemon.terminate()
+        _daemon.wait()
+        shutil.rmtree(_directory)
+
+    if _failed:
+        print('FAILED')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 migasfree team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Simulates how the server load of N desktops logging in around 08:00 is
+# spread by the sync scheduler, compared with the former "sync at start,
+# then every interval hours" behaviour. Syncs over the server capacity of
+# a minute are refused (ECONNREFUSED) and retried following the policy.
+#
+# Usage: benchmarks/sync_load_simulation.py [options]
+
+import os
+import sys
+import errno
+import random
+import optparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from migasfree_indicator.scheduler import next_due, retry_delay
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+
+class Client(object):
+    def __init__(self):
+        self.last_sync = None
+        self.due = None
+        self.failures = 0
+
+
+def simulate(options, scheduled, rng):
+    _interval = options.interval * HOUR
+    _splay = options.splay * MINUTE
+    _clients = [Client() for _ in range(options.clients)]
+    _load = {}  # minute -> sync attempts
+    _refused = 0
+
+    for _day in range(options.days):
+        _events = []
+        for _client in _clients:
+            _login = _day * DAY + 8 * HOUR + rng.uniform(0, options.login_window * MINUTE)
+            _logout = _day * DAY + 17 * HOUR
+            if scheduled:
+                _client.failures = 0
+                _client.due = next_due(_login, _client.last_sync, _interval, _splay, rng)
+            else:
+                _client.due = _login
+            _events.append((_client, _logout))
+
+        _pending = list(_events)
+        while _pending:
+            _next = []
+            for _client, _logout in _pending:
+                if _client.due >= _logout:
+                    continue
+
+                _minute = int(_client.due // MINUTE)
+                _load[_minute] = _load.get(_minute, 0) + 1
+                if _load[_minute] > options.capacity:
+                    _refused += 1
+                    _returncode = errno.ECONNREFUSED
+                else:
+                    _returncode = os.EX_OK
+
+                if _returncode == errno.ECONNREFUSED:
+                    _client.failures += 1
+                    if scheduled:
+                        _client.due += retry_delay(_client.failures, _interval, rng)
+                    else:
+                        _client.due += _interval
+                else:
+                    _client.failures = 0
+                    _client.last_sync = _client.due
+                    _client.due += _interval
+                _next.append((_client, _logout))
+            _pending = _next
+
+    return _load, _refused
+
+
+def report(name, load, refused, options):
+    _values = sorted(load.values())
+    _last_day = (options.days - 1) * DAY // MINUTE
+
+    print('%s:' % name)
+    print('  sync attempts:      %d' % sum(_values))
+    print('  refused:            %d' % refused)
+    print('  peak per minute:    %d' % _values[-1])
+    print('  p99 busy minute:    %d' % _values[int(len(_values) * 0.99)])
+    print('  last day, attempts per 10 minutes from 08:00:')
+
+    _scale = max(1, max(_values) * 10 // 60)
+    for _bucket in range(8 * 6, 11 * 6):
+        _count = sum(
+            load.get(_last_day + _bucket * 10 + _minute, 0)
+            for _minute in range(10)
+        )
+        print('    %02d:%02d %5d %s' % (
+            _bucket // 6, _bucket % 6 * 10, _count, '#' * (_count // _scale)
+        ))
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('--clients', type='int', default=2000)
+    parser.add_option('--days', type='int', default=5)
+    parser.add_option('--interval', type='int', default=24, help='hours')
+    parser.add_option('--splay', type='int', default=30, help='minutes')
+    parser.add_option('--login-window', type='int', default=15, help='minutes')
+    parser.add_option('--capacity', type='int', default=100, help='syncs per minute')
+    parser.add_option('--seed', type='int', default=1)
+    options, arguments = parser.parse_args()
+
+    for _name, _scheduled in (('fixed interval', False), ('scheduler', True)):
+        _load, _refused = simulate(options, _scheduled, random.Random(options.seed))
+        report(_name, _load, _refused, options)
+
+
+if __name__ == '__main__':
+    main()
@@ -15,32 +15,51 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
+import os
+import sys
 import locale
 import gettext
-import __builtin__
-__builtin__._ = gettext.gettext
 
 LOCALE_PATH = '/usr/share/locale'
 DOMAIN = 'migasfree-launcher'
 
-gettext.install(DOMAIN, LOCALE_PATH, unicode=1)
 
-gettext.bindtextdomain(DOMAIN, LOCALE_PATH)
-if hasattr(gettext, 'bind_textdomain_codeset'):
-    gettext.bind_textdomain_codeset(DOMAIN, 'UTF-8')
-gettext.textdomain(DOMAIN)
+# called by the entry points before the GUI modules are imported, so that
+# importing a submodule stays free of side effects
+def setup_i18n():
+    import __builtin__
+    __builtin__._ = gettext.gettext
 
-locale.bindtextdomain(DOMAIN, LOCALE_PATH)
-if hasattr(locale, 'bind_textdomain_codeset'):
-    locale.bind_textdomain_codeset(DOMAIN, 'UTF-8')
-locale.textdomain(DOMAIN)
+    gettext.install(DOMAIN, LOCALE_PATH, unicode=1)
 
-# http://www.ianbicking.org/illusive-setdefaultencoding.html
-# begin unicode hack
-import sys
+    gettext.bindtextdomain(DOMAIN, LOCALE_PATH)
+    if hasattr(gettext, 'bind_textdomain_codeset'):
+        gettext.bind_textdomain_codeset(DOMAIN, 'UTF-8')
+    gettext.textdomain(DOMAIN)
+
+    locale.bindtextdomain(DOMAIN, LOCALE_PATH)
+    if hasattr(locale, 'bind_textdomain_codeset'):
+        locale.bind_textdomain_codeset(DOMAIN, 'UTF-8')
+    locale.textdomain(DOMAIN)
+
+    # http://www.ianbicking.org/illusive-setdefaultencoding.html
+    # begin unicode hack
+    if sys.getdefaultencoding() != 'utf-8':
+        reload(sys)
+        sys.setdefaultencoding('utf-8')
+        # now default enconding is 'utf-8' ;)
+    # end unicode hack
+
+
+def get_version():
+    version_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'VERSION')
+    if not os.path.exists(version_file):
+        version_file = os.path.join(
+            sys.prefix,
+            'share',
+            'doc',
+            'migasfree-launcher',
+            'VERSION'
+        )
 
-if sys.getdefaultencoding() != 'utf-8':
-    reload(sys)
-    sys.setdefaultencoding('utf-8')
-    # now default enconding is 'utf-8' ;)
-# end unicode hack
+    return open(version_file).read().splitlines()[0]
@@ -1,5 +1,108 @@
-from migasfree_indicator import indicator
+import locale
+import gettext
+_ = gettext.gettext
+
+from migasfree_indicator import timing
+from migasfree_indicator import setup_i18n, get_version
+
+
+def parse_options():
+    import optparse
+
+    from migasfree_indicator.settings import read_config
+
+    config = read_config()
+
+    parser = optparse.OptionParser(
+        description='migasfree-indicator',
+        prog='migasfree-indicator',
+        version=get_version(),
+        usage='%prog options'
+    )
+
+    parser.add_option(
+        "--force-upgrade",
+        "-a",
+        action="store_true",
+        help=_('Force Upgrade'),
+        default=config['force_upgrade'],
+    )
+    parser.add_option(
+        "--interval",
+        "-i",
+        type="int",
+        default=config['interval'],
+    )
+    parser.add_option(
+        "--splay",
+        type="int",
+        default=config['splay'],
+    )
+    parser.add_option(
+        "--support",
+        "-s",
+        action="store",
+        default=config['support'],
+    )
+    parser.add_option(
+        "--scrollback-lines",
+        type="int",
+        default=config['scrollback_lines'],
+    )
+    parser.add_option(
+        "--scrollback-bytes",
+        type="int",
+        default=config['scrollback_bytes'],
+    )
+
+    parser.add_option(
+        "--timing",
+        action="store_true",
+        default=False,
+    )
+
+    parser.add_option(
+        "--headless",
+        action="store_true",
+        default=False,
+        help='no tray icon nor windows: the output goes to stdout',
+    )
+    parser.add_option(
+        "--once",
+        action="store_true",
+        default=False,
+        help='with --headless: sync once, as soon as there is network, '
+        'and exit with its return code',
+    )
+    parser.add_option(
+        "--command",
+        action="store",
+        default=None,
+        help='with --headless: run this command instead of '
+        'migasfree-launcher (tests and benchmarks)',
+    )
+
+    options, arguments = parser.parse_args()
+    if options.timing:
+        timing.enabled = True
+
+    return options
 
 
 def main():
-    indicator.main()
+    # no LANG (systemd units, CI): the C locale
+    try:
+        locale.setlocale(locale.LC_ALL, '')
+    except locale.Error:
+        pass
+    setup_i18n()
+
+    options = parse_options()
+
+    # imported once translations are bound: they translate at import time
+    if options.headless:
+        from migasfree_indicator import headless
+        headless.main(options)
+    else:
+        from migasfree_indicator import indicator
+        indicator.main(options)
@@ -17,16 +17,35 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
+import os
+import time
+import errno
+import codecs
+
 import gettext
 _ = gettext.gettext
 
-from gi.repository import Gtk
+from gi.repository import GLib, Gtk
+
+SPOOL_FILE = os.path.join(
+    os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')),
+    'migasfree-indicator',
+    'console.log'
+)
+READ_SIZE = 64 * 1024  # bytes
+IDLE_SLICE = 0.02  # seconds of text loading per main loop iteration
 
 
 class Console(Gtk.Window):
-    def __init__(self):
+    def __init__(self, max_lines=0, max_bytes=0):
         super(Console, self).__init__()
 
+        # scrollback caps (0 means unlimited); bytes are counted as characters
+        self.max_lines = max_lines
+        self.max_bytes = max_bytes
+        self.spool = None
+        self._progress = (0, '')
+
         sw = Gtk.ScrolledWindow()
         sw.set_policy(
             Gtk.PolicyType.AUTOMATIC,
@@ -50,17 +69,294 @@ class Console(Gtk.Window):
         box.pack_start(sw, expand=True, fill=True, padding=0)
 
         self.progress = Gtk.ProgressBar()
-        self.progress.set_pulse_step(0.02)
+        self.progress.set_show_text(True)
         progress_box = Gtk.Box(False, 0, orientation='vertical')
         progress_box.pack_start(self.progress, False, True, 0)
-        box.pack_start(progress_box, expand=False, fill=True, padding=0)
+
+        full_log = Gtk.Button(_('Show full log'))
+        full_log.connect('clicked', self.show_full_log)
+
+        history = Gtk.Button(_('History'))
+        history.connect('clicked', self.show_history)
+
+        bottom_box = Gtk.Box(spacing=6)
+        bottom_box.pack_start(progress_box, expand=True, fill=True, padding=0)
+        bottom_box.pack_start(full_log, expand=False, fill=False, padding=0)
+        bottom_box.pack_start(history, expand=False, fill=False, padding=0)
+        box.pack_start(bottom_box, expand=False, fill=True, padding=0)
 
         self.add(box)
 
-    def on_timeout(self, user_data):
-        self.progress.pulse()
-        return True
+        self.connect('show', self.on_show)
+
+    def on_show(self, widget):
+        self.draw_progress()
+
+    def set_progress(self, fraction, text):
+        # redrawn only when it changes and someone can see it
+        if (fraction, text) != self._progress:
+            self._progress = (fraction, text)
+            if self.get_visible():
+                self.draw_progress()
+
+    def draw_progress(self):
+        _fraction, _text = self._progress
+        self.progress.set_fraction(_fraction)
+        self.progress.set_text(_text)
 
     def on_click_hide(self, widget, data=None):
         self.hide()
         return True
+
+    def clear(self):
+        self.textbuffer.set_text('')
+
+        if self.spool:
+            self.spool.close()
+            self.spool = None
+
+        try:
+            if not os.path.isdir(os.path.dirname(SPOOL_FILE)):
+                os.makedirs(os.path.dirname(SPOOL_FILE))
+            self.spool = open(SPOOL_FILE, 'wb')
+        except (IOError, OSError):
+            self.spool = None
+
+    def append(self, text):
+        if self.spool:
+            try:
+                self.spool.write(text)
+            except IOError:
+                self.spool = None
+
+        _iterator = self.textbuffer.get_end_iter()
+        self.textbuffer.place_cursor(_iterator)
+        self.textbuffer.insert(_iterator, text)
+        self.trim()
+
+        self.textview.scroll_to_mark(
+            self.textbuffer.get_insert(),
+            0.1, False, 0, 0
+        )
+
+    def trim(self):
+        # drops the oldest lines in bulk, once a cap is exceeded by 10%
+        _lines = 0
+
+        if self.max_lines:
+            _count = self.textbuffer.get_line_count()
+            if _count > self.max_lines + self.max_lines // 10:
+                _lines = _count - self.max_lines
+
+        if self.max_bytes:
+            _count = self.textbuffer.get_char_count()
+            if _count > self.max_bytes + self.max_bytes // 10:
+                _iterator = self.textbuffer.get_iter_at_offset(
+                    _count - self.max_bytes
+                )
+                if not _iterator.starts_line():
+                    _iterator.forward_line()
+                _lines = max(_lines, _iterator.get_line())
+
+        if _lines:
+            self.textbuffer.delete(
+                self.textbuffer.get_start_iter(),
+                self.textbuffer.get_iter_at_line(_lines)
+            )
+
+    def show_full_log(self, widget):
+        if self.spool:
+            self.spool.flush()
+
+        try:
+            FullLog(SPOOL_FILE).show_all()
+        except (IOError, OSError) as e:
+            if e.errno != errno.ENOENT:
+                raise
+
+    def show_history(self, widget):
+        from .history import RunHistory
+
+        HistoryWindow(RunHistory()).show_all()
+
+
+def read_text(handle):
+    # decoded text of an open file, a chunk at a time; closes it at the end
+    _decoder = codecs.getincrementaldecoder('utf-8')('replace')
+    try:
+        while True:
+            _chunk = handle.read(READ_SIZE)
+            if not _chunk:
+                break
+            yield _decoder.decode(_chunk)
+        yield _decoder.decode(b'', True)
+    finally:
+        handle.close()
+
+
+# fills self.textbuffer from an iterator of texts, a slice at a time in the
+# idle handler, so the window never blocks
+class TextStream(object):
+    _source_id = 0
+
+    def stream(self, texts):
+        self.stop()
+        self.textbuffer.set_text('')
+        self._source_id = GLib.idle_add(self.on_idle, texts)
+
+    def stop(self):
+        if self._source_id:
+            GLib.source_remove(self._source_id)
+            self._source_id = 0
+
+    def on_idle(self, texts):
+        _texts = []
+        _deadline = time.time() + IDLE_SLICE
+        try:
+            while time.time() < _deadline:
+                _texts.append(next(texts))
+        except (StopIteration, IOError, OSError):
+            self._source_id = 0
+        finally:
+            self.textbuffer.insert(
+                self.textbuffer.get_end_iter(), u''.join(_texts)
+            )
+
+        return self._source_id != 0
+
+
+# the whole spool file, streamed as the history is
+class FullLog(TextStream, Gtk.Window):
+    def __init__(self, path):
+        super(FullLog, self).__init__()
+
+        sw = Gtk.ScrolledWindow()
+        sw.set_policy(
+            Gtk.PolicyType.AUTOMATIC,
+            Gtk.PolicyType.AUTOMATIC
+        )
+        self.textview = Gtk.TextView()
+        self.textbuffer = self.textview.get_buffer()
+        self.textview.set_editable(False)
+        self.textview.set_wrap_mode(Gtk.WrapMode.WORD)
+        sw.add(self.textview)
+
+        self.set_title(_('Migasfree Console'))
+        self.set_icon_name('migasfree')
+        self.resize(640, 420)
+        self.set_border_width(10)
+        self.add(sw)
+
+        self.connect('delete-event', self.on_close)
+
+        # opened here: a missing spool file raises before the window shows
+        self.stream(read_text(open(path, 'rb')))
+
+    def on_close(self, widget, data=None):
+        self.stop()
+        self.destroy()
+        return True
+
+
+# past runs, newest first: the output of the selected one, or the lines
+# matching a search in all of them, is streamed from the compressed
+# history a slice at a time
+class HistoryWindow(TextStream, Gtk.Window):
+    def __init__(self, history):
+        super(HistoryWindow, self).__init__()
+
+        self.history = history
+        self.entries = history.entries()
+
+        self.store = Gtk.ListStore(int, str, str, str)
+        for _index in reversed(range(len(self.entries))):
+            _entry = self.entries[_index]
+            self.store.append([
+                _index,
+                time.strftime(
+                    '%Y-%m-%d %H:%M', time.localtime(_entry['start'])
+                ),
+                '%d s' % _entry['duration'],
+                str(_entry['exit_code']),
+            ])
+
+        self.runs = Gtk.TreeView(self.store)
+        for _column, _title in enumerate(
+                [_('Start'), _('Duration'), _('Exit code')], 1):
+            self.runs.append_column(Gtk.TreeViewColumn(
+                _title, Gtk.CellRendererText(), text=_column
+            ))
+        self.runs.get_selection().connect('changed', self.on_run_selected)
+
+        runs_sw = Gtk.ScrolledWindow()
+        runs_sw.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
+        runs_sw.add(self.runs)
+
+        self.search = Gtk.SearchEntry()
+        self.search.connect('activate', self.on_search)
+
+        left_box = Gtk.Box(spacing=6, orientation='vertical')
+        left_box.pack_start(self.search, expand=False, fill=True, padding=0)
+        left_box.pack_start(runs_sw, expand=True, fill=True, padding=0)
+
+        sw = Gtk.ScrolledWindow()
+        sw.set_policy(
+            Gtk.PolicyType.AUTOMATIC,
+            Gtk.PolicyType.AUTOMATIC
+        )
+        self.textview = Gtk.TextView()
+        self.textbuffer = self.textview.get_buffer()
+        self.textview.set_editable(False)
+        self.textview.set_wrap_mode(Gtk.WrapMode.WORD)
+        sw.add(self.textview)
+
+        paned = Gtk.Paned()
+        paned.pack1(left_box, resize=False, shrink=False)
+        paned.pack2(sw, resize=True, shrink=False)
+
+        self.set_title(_('Migasfree History'))
+        self.set_icon_name('migasfree')
+        self.resize(860, 420)
+        self.set_border_width(10)
+        self.add(paned)
+
+        self.connect('delete-event', self.on_close)
+
+    def on_run_selected(self, selection):
+        _model, _iterator = selection.get_selected()
+        if _iterator is None:
+            return
+
+        _decoder = codecs.getincrementaldecoder('utf-8')('replace')
+        _entry = self.entries[_model[_iterator][0]]
+        self.stream(
+            _decoder.decode(_text) for _text in self.history.read(_entry)
+        )
+
+    def on_search(self, entry):
+        _pattern = entry.get_text()
+        if not _pattern:
+            return
+
+        self.runs.get_selection().unselect_all()
+        self.stream(
+            self.format_match(_entry, _line)
+            for _entry, _line in self.history.search(
+                _pattern, self.entries
+            )
+        )
+
+    def format_match(self, entry, line):
+        # no line: a chunk searched without matches, nothing to show
+        if line is None:
+            return u''
+
+        return '%s  %s\n' % (
+            time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['start'])),
+            line.decode('utf-8', 'replace')
+        )
+
+    def on_close(self, widget, data=None):
+        self.stop()
+        self.destroy()
+        return True
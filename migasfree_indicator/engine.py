@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 migasfree team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import time
+import errno
+
+import gettext
+_ = gettext.gettext
+
+from gi.repository import GObject
+
+from .output import OutputBuffer
+from .history import RunHistory
+from .network import NetworkWatcher
+from .watcher import FileWatcher
+from .terminal import TerminalFilter, TextDecoder
+from .progress import ProgressModel
+from .runner import Runner, ProcessJob
+from .settings import DEFAULT_INTERVAL
+from .scheduler import SyncScheduler
+from .jobs import JobQueue, Job, PRIORITY_FORCE, STARTED
+
+CMD_UPGRADE = "sudo migasfree-launcher"
+CMD_FORCE_UPGRADE = "sudo migasfree-launcher force-upgrade"
+
+HELPER_JOBS = {
+    CMD_UPGRADE: 'upgrade',
+    CMD_FORCE_UPGRADE: 'force-upgrade',
+}
+
+FIRST_RUN = "/var/tmp/migasfree/first-tags.conf"
+CHANGE_NODE = "/var/tmp/migasfree/change-node.conf"
+REBOOT_REQUIRED = "/var/run/reboot-required"
+
+STATUS_OK = 'idle'
+STATUS_WARNING = 'warning'
+STATUS_ERROR = 'error'
+
+
+def get_status(return_code):
+    if return_code == errno.ECONNREFUSED:
+        return STATUS_ERROR
+    elif return_code != os.EX_OK:
+        return STATUS_WARNING
+
+    return STATUS_OK
+
+
+# everything but the user interface: waits for the network, schedules the
+# syncs, runs the launcher and turns its output into ready to show text,
+# also kept in the run history
+# needs a GLib main loop, but neither Gtk nor a display; consumers connect
+# to its signals:
+#   started (command)            a sync has begun
+#   output (text)                cleaned UTF-8 text, in batches
+#   progress (fraction, label)   the phase or the percent has changed
+#   finished (return code)       a sync has ended (see get_status)
+#   first-run ()                 the first sync of this computer is pending
+#   reboot-required ()           a restart is needed to finish updating
+#   network-timeout ()           still no network after WAIT_IP_TIMEOUT
+#   queue-changed ()             the running or the pending job has changed
+class SyncEngine(GObject.GObject):
+    __gsignals__ = {
+        'started': (GObject.SignalFlags.RUN_FIRST, None, (str,)),
+        'output': (GObject.SignalFlags.RUN_FIRST, None, (str,)),
+        'progress': (GObject.SignalFlags.RUN_FIRST, None, (float, str)),
+        'finished': (GObject.SignalFlags.RUN_FIRST, None, (int,)),
+        'first-run': (GObject.SignalFlags.RUN_FIRST, None, ()),
+        'reboot-required': (GObject.SignalFlags.RUN_FIRST, None, ()),
+        'network-timeout': (GObject.SignalFlags.RUN_FIRST, None, ()),
+        'queue-changed': (GObject.SignalFlags.RUN_FIRST, None, ()),
+    }
+
+    def __init__(self, settings):
+        super(SyncEngine, self).__init__()
+
+        self.start_time = time.time()
+        # set when the network coming up starts a sync, reported by that run
+        self.time_to_first_sync = None
+
+        self.settings = settings
+        self.settings.connect('changed', self.on_settings_changed)
+
+        self.scheduler = SyncScheduler(
+            self.on_scheduled,
+            self.get_interval(),
+            self.settings.splay * 60
+        )
+
+        # replaces the launcher when set (tests and benchmarks)
+        self.custom_command = None
+        self.sync_now = False
+
+        self.is_upgrading = False
+        self.reboot_pending = False
+        self.runner = None
+        self.command = None
+        self.return_code = None
+        self.queue = JobQueue()
+
+        self.output = OutputBuffer(self.on_text)
+        self.history = RunHistory()
+
+        self.network = NetworkWatcher(
+            self.on_network_ready,
+            on_timeout=self.on_network_timeout
+        )
+        self.watcher = FileWatcher(
+            [REBOOT_REQUIRED, FIRST_RUN, CHANGE_NODE],
+            self.on_file_changed
+        )
+
+    def start(self, sync_now=False):
+        # sync_now: sync as soon as there is network, ignoring the schedule
+        self.sync_now = sync_now
+
+        if os.path.isfile(FIRST_RUN):
+            self.emit('first-run')
+
+        self.network.start()
+        self.watcher.start()
+        self.check_reboot()
+
+    def on_network_ready(self, elapsed):
+        # measured by the watcher from start(), whatever the schedule does
+        # next; buffered, so a sync started right away shows it too
+        self.output.write(_('Network ready after %.2f s') % elapsed + '\n')
+
+        if self.sync_now or os.path.isfile(FIRST_RUN):
+            self.time_to_first_sync = time.time() - self.start_time
+            self.update_system()
+        else:
+            self.scheduler.start()
+
+    def on_network_timeout(self):
+        self.output.write(_('No network access') + '\n')
+        self.output.flush_now()
+        self.emit('network-timeout')
+
+    def on_file_changed(self, path):
+        if path == REBOOT_REQUIRED:
+            self.check_reboot()
+        elif os.path.isfile(path) and self.network.is_ready:
+            if path == FIRST_RUN:
+                self.emit('first-run')
+            self.update_system()
+
+    def get_interval(self):
+        return (self.settings.interval or DEFAULT_INTERVAL) * 3600
+
+    def on_settings_changed(self, settings, key):
+        if key == 'interval':
+            self.scheduler.set_interval(self.get_interval())
+        elif key == 'splay':
+            self.scheduler.splay = settings.splay * 60
+
+    def check_reboot(self):
+        if not self.is_upgrading and not self.reboot_pending \
+                and os.path.isfile(REBOOT_REQUIRED):
+            self.reboot_pending = True
+            self.emit('reboot-required')
+
+        return False
+
+    def force_upgrade(self):
+        return self.request(
+            Job(self.custom_command or CMD_FORCE_UPGRADE, PRIORITY_FORCE)
+        )
+
+    def on_scheduled(self):
+        # forced and first runs are never deferred
+        from .policy import on_battery
+
+        _reason = None
+        if self.settings.defer_on_battery and on_battery():
+            _reason = _('on battery power')
+        elif self.settings.defer_on_metered and self.network.is_metered():
+            _reason = _('metered connection')
+
+        if _reason and not os.path.isfile(FIRST_RUN):
+            self.output.write(
+                _('Scheduled sync deferred: %s') % _reason + '\n'
+            )
+            self.output.flush_now()
+            self.scheduler.defer()
+            return
+
+        self.update_system()
+
+    def upgrade(self):
+        # returns what the queue did with it (jobs.STARTED, QUEUED, ...)
+        if self.settings.force_upgrade:
+            _command = CMD_FORCE_UPGRADE
+        else:
+            _command = CMD_UPGRADE
+
+        return self.request(Job(self.custom_command or _command))
+
+    def update_system(self):
+        self.upgrade()
+
+        return False
+
+    def request(self, job):
+        # returns what the queue did with it (jobs.STARTED, QUEUED, ...)
+        _result = self.queue.push(job)
+        if _result == STARTED:
+            self.run_command(job.command)
+        self.emit('queue-changed')
+
+        return _result
+
+    def cancel(self):
+        if self.queue.cancel():
+            self.emit('queue-changed')
+
+    def run_command(self, command):
+        self.is_upgrading = True
+        self.command = command
+        self.run_start = time.time()
+        self.first_output = None
+        self.output_size = 0
+
+        self.history.begin(self.run_start)
+        self.emit('started', command)
+
+        if self.time_to_first_sync is not None:
+            self.output.write(
+                _('Time to first sync: %.2f seconds') % self.time_to_first_sync
+                + '\n'
+            )
+            self.time_to_first_sync = None
+
+        self.filter = TerminalFilter()
+        self.decoder = TextDecoder()
+        self.progress = ProgressModel()
+        self.emit('progress', self.progress.fraction, self.progress.label)
+        try:
+            _job = self.get_job(command)
+        except OSError as e:
+            self.output.write(self.decoder.feed('%s\n' % e))
+            self.on_exit(e.errno)
+            return
+
+        self.runner = Runner(_job, self.on_output, self.on_exit)
+
+    def get_job(self, command):
+        import socket
+
+        from .helper import HelperJob
+        from .policy import read_policy
+
+        try:
+            # the helper applies the policy itself (as root)
+            return HelperJob(HELPER_JOBS[command])
+        except (KeyError, socket.error):
+            _policy = read_policy()
+            self.output.write(_policy.describe())
+
+            return ProcessJob(_policy.wrap(command.split(" ")))
+
+    def on_output(self, data):
+        if self.first_output is None:
+            self.first_output = time.time() - self.run_start
+        self.output_size += len(data)
+
+        _text = self.filter.feed(data)
+        self.output.write(self.decoder.feed(_text))
+
+        if self.progress.feed(data, _text):
+            self.emit('progress', self.progress.fraction, self.progress.label)
+
+    def on_text(self, text):
+        self.history.write(text)
+        self.emit('output', text)
+
+    def on_exit(self, return_code):
+        self.runner = None
+        self.output.write(self.decoder.feed(self.filter.flush(), final=True))
+        self.output.flush_now()
+        self.history.finish(return_code)
+
+        self.is_upgrading = False
+        self.return_code = return_code
+        self.scheduler.finished(return_code)
+        self.record_run(return_code)
+
+        self.emit('finished', return_code)
+        self.check_reboot()
+
+        _next = self.queue.done()
+        self.emit('queue-changed')
+        if _next:
+            self.run_command(_next.command)
+
+    def record_run(self, return_code):
+        from .metrics import make_event, append_event, USER_HISTORY_FILE
+
+        append_event(
+            make_event(
+                'indicator',
+                self.run_start,
+                time.time(),
+                return_code,
+                self.output_size,
+                command=self.command,
+                first_output=self.first_output
+            ),
+            USER_HISTORY_FILE
+        )
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 migasfree team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+
+import os
+import sys
+import errno
+
+import gettext
+_ = gettext.gettext
+
+from gi.repository import GLib
+
+from .engine import SyncEngine
+from .settings import Settings
+from .status import StatusService
+
+
+# the sync engine with no tray icon nor windows (kiosks, CI, benchmarks):
+# the output goes to stdout, so to the journal when run by systemd
+class HeadlessApp(object):
+    def __init__(self, settings, once=False, command=None):
+        self.once = once
+        self.command = command
+        self.return_code = os.EX_OK
+        self.loop = GLib.MainLoop()
+
+        self.engine = SyncEngine(settings)
+        self.engine.custom_command = command
+        self.engine.connect('output', self.on_output)
+        self.engine.connect('finished', self.on_finished)
+        self.engine.connect('reboot-required', self.on_reboot_required)
+        self.engine.connect('network-timeout', self.on_network_timeout)
+
+        # a one-off run has nobody to answer
+        self.status = None if once else StatusService(self.engine)
+
+    def on_output(self, engine, text):
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+    def on_finished(self, engine, return_code):
+        self.return_code = return_code
+        if self.once:
+            self.loop.quit()
+
+    def on_reboot_required(self, engine):
+        self.on_output(
+            engine,
+            _('Restart your computer to finish updating the system') + '\n'
+        )
+
+    def on_network_timeout(self, engine):
+        if self.once:
+            self.return_code = errno.ENETUNREACH
+            self.loop.quit()
+
+    def run(self):
+        if self.once and self.command:
+            # a local command does not need to wait for the network
+            GLib.idle_add(self.engine.update_system)
+        else:
+            self.engine.start(sync_now=self.once)
+
+        try:
+            self.loop.run()
+        except KeyboardInterrupt:
+            pass
+
+        return self.return_code
+
+
+def main(options):
+    settings = Settings(options)
+
+    sys.exit(HeadlessApp(settings, options.once, options.command).run())
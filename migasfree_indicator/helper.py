@@ -0,0 +1,353 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 migasfree team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Long-lived privileged helper: runs migasfree-launcher on behalf of the
+# indicators through a local socket, without sudo and with the client
+# config and graphic user lookups cached between runs.
+#
+# Protocol: the client sends a job name and a newline ('upgrade' or
+# 'force-upgrade'); the helper answers with frames made of a type byte,
+# a 32 bits payload length and the payload: 'O' for output chunks and a
+# final 'X' with the launcher exit code.
+#
+# There is one launcher run at a time for the whole system, however many
+# sessions ask for it (terminal servers): a client asking while a run that
+# covers its job is in progress attaches to it, gets its output from the
+# beginning and its exit code; otherwise it waits for the next run, which
+# is shared by every client asking meanwhile.
+
+import os
+import sys
+import pwd
+import stat
+import errno
+import socket
+import struct
+import threading
+import subprocess
+import SocketServer
+
+from distutils.spawn import find_executable
+
+from .policy import read_policy
+
+SOCKET_PATH = '/run/migasfree-launcher.sock'
+LAUNCHER = find_executable('migasfree-launcher') or '/usr/bin/migasfree-launcher'
+READ_SIZE = 64 * 1024  # bytes
+
+JOBS = {
+    'upgrade': [],
+    'force-upgrade': ['force-upgrade'],
+}
+
+# a running job covers the requests of the same or lower priority
+PRIORITIES = {
+    'upgrade': 0,
+    'force-upgrade': 1,
+}
+
+FRAME_HEADER = struct.Struct('!cI')
+FRAME_OUTPUT = 'O'
+FRAME_EXIT = 'X'
+
+SO_PEERCRED = getattr(socket, 'SO_PEERCRED', 17)
+PEERCRED = struct.Struct('3i')  # pid, uid, gid
+
+
+def write_frame(sock, frame_type, payload):
+    sock.sendall(FRAME_HEADER.pack(frame_type, len(payload)) + payload)
+
+
+class ClientCache(object):
+    def __init__(self):
+        self._server = None
+        self._config_mtime = None
+        self._user = None
+        self._graphic_pid = None
+
+    def server(self):
+        from migasfree_client import settings
+        from migasfree_client.utils import get_config
+
+        try:
+            _mtime = os.stat(settings.CONF_FILE).st_mtime
+        except OSError:
+            _mtime = None
+
+        if self._server is None or _mtime != self._config_mtime:
+            _config = get_config(settings.CONF_FILE, 'client')
+            if not isinstance(_config, dict):
+                _config = {}
+            self._server = _config.get('server', 'localhost')
+            self._config_mtime = _mtime
+
+        return self._server
+
+    def graphic_user(self):
+        from migasfree_client import utils
+
+        if self._graphic_pid \
+                and os.path.exists('/proc/%d' % self._graphic_pid):
+            return self._user
+
+        self._graphic_pid = utils.get_graphic_pid()[0]
+        self._user = utils.get_graphic_user(self._graphic_pid) \
+            if self._graphic_pid else ''
+
+        return self._user
+
+
+# one launcher run, whose output is kept so that clients attaching late
+# get all of it
+class SharedRun(object):
+    def __init__(self, job, env):
+        self.job = job
+        self.env = env
+        self.returncode = None
+
+        self._chunks = []
+        self._condition = threading.Condition()
+
+    def append(self, chunk):
+        with self._condition:
+            self._chunks.append(chunk)
+            self._condition.notify_all()
+
+    def finish(self, returncode):
+        with self._condition:
+            self.returncode = returncode
+            self._condition.notify_all()
+
+    def follow(self):
+        # yields the output from the beginning until the run has finished
+        _index = 0
+        while True:
+            with self._condition:
+                while _index >= len(self._chunks) and self.returncode is None:
+                    self._condition.wait()
+                _chunks = self._chunks[_index:]
+                _finished = self.returncode is not None
+            _index += len(_chunks)
+
+            for _chunk in _chunks:
+                yield _chunk
+
+            if _finished and not _chunks:
+                return
+
+    def run(self, command):
+        try:
+            _process = subprocess.Popen(
+                command,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                close_fds=True,
+                env=self.env
+            )
+        except OSError as e:
+            self.append('%s: %s\n' % (command[0], e.strerror))
+            self.finish(e.errno)
+            return
+
+        while True:
+            _chunk = os.read(_process.stdout.fileno(), READ_SIZE)
+            if not _chunk:
+                break
+            self.append(_chunk)
+
+        _process.stdout.close()
+        self.finish(_process.wait())
+
+
+class HelperHandler(SocketServer.StreamRequestHandler):
+    def handle(self):
+        _job = self.rfile.readline().strip()
+        if _job not in JOBS:
+            write_frame(self.connection, FRAME_EXIT, str(errno.EINVAL))
+            return
+
+        _run = self.server.submit(_job, self.environment())
+
+        # the upgrade goes on even if the indicator went away
+        try:
+            for _chunk in _run.follow():
+                write_frame(self.connection, FRAME_OUTPUT, _chunk)
+            write_frame(self.connection, FRAME_EXIT, str(_run.returncode))
+        except socket.error:
+            pass
+
+    def environment(self):
+        _uid = self.peer_uid()
+        _env = dict(os.environ)
+        _env['MIGASFREE_SERVER'] = self.server.cache.server()
+        if _uid:
+            _env['SUDO_UID'] = str(_uid)
+            _env['MIGASFREE_USER'] = pwd.getpwuid(_uid).pw_name
+        else:
+            _env['MIGASFREE_USER'] = self.server.cache.graphic_user()
+
+        return _env
+
+    def peer_uid(self):
+        try:
+            _, _uid, _ = PEERCRED.unpack(self.connection.getsockopt(
+                socket.SOL_SOCKET,
+                SO_PEERCRED,
+                PEERCRED.size
+            ))
+        except socket.error:
+            return None
+
+        return _uid
+
+
+class HelperServer(SocketServer.ThreadingMixIn, SocketServer.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path=SOCKET_PATH, launcher=LAUNCHER):
+        if os.path.exists(path):
+            os.unlink(path)
+
+        SocketServer.UnixStreamServer.__init__(self, path, HelperHandler)
+        # anyone allowed to run "sudo migasfree-launcher" may ask for a job
+        os.chmod(path, stat.S_IRUSR | stat.S_IWUSR | stat.S_IRGRP
+                 | stat.S_IWGRP | stat.S_IROTH | stat.S_IWOTH)
+
+        self.launcher = launcher
+        self.cache = ClientCache()
+
+        self.current = None
+        self.pending = None
+        self._condition = threading.Condition()
+
+        _worker = threading.Thread(target=self.work)
+        _worker.setDaemon(True)
+        _worker.start()
+
+    def submit(self, job, env):
+        # returns the run that will answer this request
+        with self._condition:
+            _current = self.current
+            if _current and _current.returncode is None \
+                    and PRIORITIES[_current.job] >= PRIORITIES[job]:
+                _run = _current
+            elif self.pending:
+                _run = self.pending
+                if PRIORITIES[job] > PRIORITIES[_run.job]:
+                    _run.job = job
+                    _run.env = env
+            else:
+                _run = self.pending = SharedRun(job, env)
+                self._condition.notify_all()
+
+        return _run
+
+    def work(self):
+        while True:
+            with self._condition:
+                while self.pending is None:
+                    self._condition.wait()
+                self.current, self.pending = self.pending, None
+
+            # read for every run: the conf file may have changed
+            _policy = read_policy()
+            self.current.append(_policy.describe(scope=True))
+            _command = [self.launcher] + JOBS[self.current.job]
+            self.current.run(_policy.wrap(_command, scope=True))
+
+
+class FrameDecoder(object):
+    def __init__(self):
+        self._buffer = ''
+
+    def feed(self, data):
+        self._buffer += data
+
+        _frames = []
+        while len(self._buffer) >= FRAME_HEADER.size:
+            _type, _length = FRAME_HEADER.unpack_from(self._buffer)
+            _end = FRAME_HEADER.size + _length
+            if len(self._buffer) < _end:
+                break
+
+            _frames.append((_type, self._buffer[FRAME_HEADER.size:_end]))
+            self._buffer = self._buffer[_end:]
+
+        return _frames
+
+
+# client side, used by the indicator from its main loop: read() returns
+# the output available on a readable socket, eof is set once the helper
+# has finished, and close() returns the launcher exit code
+class HelperJob(object):
+    def __init__(self, job, path=SOCKET_PATH):
+        self.returncode = None
+        self.eof = False
+        self._decoder = FrameDecoder()
+
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self._sock.connect(path)
+            self._sock.sendall(job + '\n')
+        except socket.error:
+            self._sock.close()
+            raise
+
+        self._sock.setblocking(False)
+
+    def fileno(self):
+        return self._sock.fileno()
+
+    def read(self):
+        try:
+            _data = self._sock.recv(READ_SIZE)
+        except socket.error as e:
+            if e.errno in (errno.EAGAIN, errno.EINTR):
+                return ''
+            _data = ''
+
+        if not _data:
+            self.eof = True
+            return ''
+
+        _output = []
+        for _type, _payload in self._decoder.feed(_data):
+            if _type == FRAME_EXIT:
+                self.returncode = int(_payload)
+            else:
+                _output.append(_payload)
+
+        return ''.join(_output)
+
+    def close(self):
+        self._sock.close()
+        if self.returncode is None:
+            self.returncode = errno.EPIPE
+
+        return self.returncode
+
+
+def main():
+    if os.geteuid() != 0:
+        print('migasfree-launcher-helper must be run as root')
+        sys.exit(errno.EPERM)
+
+    HelperServer().serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 migasfree team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Cleaned output of past syncs, compressed on disk:
+#  * every run is one gzip member appended to the current segment file
+#    (runs-NNNNNN.gz), compressed while it is written
+#  * index.jsonl has a line per finished run: id, start, duration, exit
+#    code, segment, offset and length of its member, text size
+#  * a new segment is started once the current one exceeds SEGMENT_SIZE,
+#    and the oldest ones are removed beyond MAX_SEGMENTS
+# A run is read back on its own, seeking to its member, and searches
+# stream through the members: nothing is ever loaded whole.
+
+import os
+import re
+import json
+import zlib
+import time
+
+HISTORY_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')),
+    'migasfree-indicator',
+    'history'
+)
+INDEX_FILE = 'index.jsonl'
+
+SEGMENT_SIZE = 1024 * 1024  # compressed bytes
+MAX_SEGMENTS = 10
+COMPRESS_LEVEL = 6
+READ_SIZE = 64 * 1024  # compressed bytes
+
+_SEGMENT = re.compile(r'^runs-(\d{6})\.gz$')
+
+
+class RunHistory(object):
+    def __init__(self, path=HISTORY_DIR, segment_size=SEGMENT_SIZE,
+                 max_segments=MAX_SEGMENTS):
+        self.path = path
+        self.segment_size = segment_size
+        self.max_segments = max_segments
+
+        self._handle = None
+        self._compressor = None
+        self._run = None
+
+    def segment_path(self, segment):
+        return os.path.join(self.path, 'runs-%06d.gz' % segment)
+
+    def segments(self):
+        try:
+            _names = os.listdir(self.path)
+        except OSError:
+            return []
+
+        return sorted(
+            int(_match.group(1))
+            for _match in (_SEGMENT.match(_name) for _name in _names)
+            if _match
+        )
+
+    def entries(self):
+        # finished runs, oldest first
+        _entries = []
+        try:
+            with open(os.path.join(self.path, INDEX_FILE)) as _handle:
+                for _line in _handle:
+                    try:
+                        _entries.append(json.loads(_line))
+                    except ValueError:
+                        pass  # cut by a crash
+        except (IOError, OSError):
+            pass
+
+        return _entries
+
+    def begin(self, start=None):
+        if self._handle:
+            self.finish(None)
+
+        try:
+            _segment = self.current_segment()
+            _handle = open(self.segment_path(_segment), 'ab')
+            _handle.seek(0, os.SEEK_END)
+        except (IOError, OSError):
+            return
+
+        _entries = self.entries()
+        self._handle = _handle
+        self._compressor = zlib.compressobj(
+            COMPRESS_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS  # gzip
+        )
+        self._run = {
+            'id': _entries[-1]['id'] + 1 if _entries else 1,
+            'start': round(start or time.time(), 3),
+            'segment': _segment,
+            'offset': _handle.tell(),
+            'size': 0,
+        }
+
+    def write(self, text):
+        # ignored outside a run
+        if self._handle:
+            self._run['size'] += len(text)
+            self._write(self._compressor.compress(text))
+
+    def _write(self, data):
+        try:
+            if data:
+                self._handle.write(data)
+        except IOError:
+            self._handle.close()
+            self._handle = None
+
+    def finish(self, exit_code, end=None):
+        if not self._handle:
+            return
+
+        self._write(self._compressor.flush())
+        if not self._handle:
+            return
+
+        _run = self._run
+        _run['length'] = self._handle.tell() - _run['offset']
+        _run['duration'] = round((end or time.time()) - _run['start'], 3)
+        _run['exit_code'] = exit_code
+        self._handle.close()
+        self._handle = None
+
+        try:
+            with open(os.path.join(self.path, INDEX_FILE), 'a') as _handle:
+                _handle.write(json.dumps(_run, sort_keys=True) + '\n')
+        except (IOError, OSError):
+            pass
+
+    def current_segment(self):
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+
+        _segments = self.segments()
+        if _segments and os.path.getsize(
+                self.segment_path(_segments[-1])) < self.segment_size:
+            return _segments[-1]
+
+        _segment = _segments[-1] + 1 if _segments else 1
+        self.rotate(_segments[:max(0, len(_segments) + 1 - self.max_segments)])
+
+        return _segment
+
+    def rotate(self, segments):
+        # removes these segments and their runs from the index
+        if not segments:
+            return
+
+        _entries = [
+            _entry for _entry in self.entries()
+            if _entry['segment'] not in segments
+        ]
+        _path = os.path.join(self.path, INDEX_FILE)
+        with open(_path + '.tmp', 'w') as _handle:
+            for _entry in _entries:
+                _handle.write(json.dumps(_entry, sort_keys=True) + '\n')
+        os.rename(_path + '.tmp', _path)
+
+        for _segment in segments:
+            os.remove(self.segment_path(_segment))
+
+    def read(self, entry):
+        # yields the UTF-8 text of a run, a decompressed chunk at a time
+        # (up to the first damaged byte)
+        _decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        _remaining = entry['length']
+
+        with open(self.segment_path(entry['segment']), 'rb') as _handle:
+            _handle.seek(entry['offset'])
+            while _remaining > 0:
+                _data = _handle.read(min(READ_SIZE, _remaining))
+                if not _data:
+                    break
+                _remaining -= len(_data)
+
+                try:
+                    _text = _decompressor.decompress(_data)
+                except zlib.error:
+                    return
+                if _text:
+                    yield _text
+
+        _text = _decompressor.flush()
+        if _text:
+            yield _text
+
+    def search(self, pattern, entries=None):
+        # yields (entry, line) for every line containing pattern (ASCII
+        # letters in any case), newest run first, and (entry, None) after
+        # every decompressed chunk, so that a caller streaming the results
+        # gets control back even when nothing matches
+        _pattern = pattern.lower()
+
+        for _entry in reversed(self.entries() if entries is None else entries):
+            try:
+                _rest = ''
+                for _text in self.read(_entry):
+                    _text = _rest + _text
+                    _end = _text.rfind('\n') + 1
+                    _rest = _text[_end:]
+
+                    # most chunks have no match at all: not split in lines
+                    if _pattern in _text[:_end].lower():
+                        for _line in _text[:_end].splitlines():
+                            if _pattern in _line.lower():
+                                yield _entry, _line
+                    yield _entry, None
+                if _rest and _pattern in _rest.lower():
+                    yield _entry, _rest
+            except (IOError, OSError):
+                continue  # rotated meanwhile or damaged
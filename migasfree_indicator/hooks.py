@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 migasfree team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Runs the prerun.d / postrun.d hooks of migasfree-launcher.
+#
+# A hook may declare in its first comment lines:
+#   # migasfree-hook-mode: parallel       (default: source)
+#   # migasfree-hook-after: 10-proxy 20-certs
+#   # migasfree-hook-timeout: 600         (seconds, parallel hooks only)
+#
+# Hooks are ordered by name and by their "after" dependencies. "source"
+# hooks are sourced by the launcher shell, as always, so they can change
+# its environment; they split the list in groups of "parallel" hooks,
+# which run as separate processes, at most --jobs at a time, as soon as
+# the hooks they depend on have finished.
+#
+# Usage:
+#   migasfree-launcher-hooks plan DIR        prints "source FILE" and
+#                                            "run GROUP" lines, in order
+#   migasfree-launcher-hooks run DIR GROUP   runs a group of parallel hooks
+
+import os
+import re
+import sys
+import time
+import glob
+import heapq
+import signal
+import optparse
+import tempfile
+import subprocess
+
+MODE_SOURCE = 'source'
+MODE_PARALLEL = 'parallel'
+
+DEFAULT_TIMEOUT = 300  # seconds
+KILL_GRACE = 5  # seconds between SIGTERM and SIGKILL
+POLL_INTERVAL = 0.05  # seconds
+HEADER_LINES = 20
+
+_HEADER = re.compile(r'^#\s*migasfree-hook-(\w+)\s*:\s*(.*?)\s*$')
+
+
+def hook_name(path):
+    _name = os.path.basename(path)
+    if _name.endswith('.sh'):
+        _name = _name[:-3]
+
+    return _name
+
+
+class Hook(object):
+    def __init__(self, path):
+        self.path = path
+        self.name = hook_name(path)
+        self.mode = MODE_SOURCE
+        self.after = []
+        self.timeout = DEFAULT_TIMEOUT
+
+        with open(path) as _handle:
+            for _number, _line in enumerate(_handle):
+                if _number >= HEADER_LINES:
+                    break
+
+                _match = _HEADER.match(_line)
+                if not _match:
+                    continue
+
+                _key, _value = _match.groups()
+                if _key == 'mode' and _value in (MODE_SOURCE, MODE_PARALLEL):
+                    self.mode = _value
+                elif _key == 'after':
+                    self.after.extend(hook_name(_item) for _item in _value.split())
+                elif _key == 'timeout':
+                    try:
+                        self.timeout = float(_value)
+                    except ValueError:
+                        pass
+
+
+def load_hooks(path):
+    return [
+        Hook(_file)
+        for _file in sorted(glob.glob(os.path.join(path, '*.sh')))
+        if os.access(_file, os.R_OK)
+    ]
+
+
+def sort_hooks(hooks, verbose=False):
+    # by name, unless an "after" dependency says otherwise
+    # unknown dependencies are ignored and cycles are broken by name
+    _names = dict((_hook.name, _hook) for _hook in hooks)
+    _waiting = dict(
+        (_hook.name, set(_item for _item in _hook.after if _item in _names))
+        for _hook in hooks
+    )
+
+    _ready = [_name for _name, _after in _waiting.items() if not _after]
+    heapq.heapify(_ready)
+
+    _sorted = []
+    while _waiting:
+        if not _ready:
+            _name = min(_waiting)
+            if verbose:
+                sys.stderr.write(
+                    'Hook %s: dependency cycle, run in name order\n' % _name
+                )
+            _waiting[_name] = set()
+            _ready = [_name]
+
+        _name = heapq.heappop(_ready)
+        if _name not in _waiting:
+            continue
+
+        del _waiting[_name]
+        _sorted.append(_names[_name])
+
+        for _other, _after in _waiting.items():
+            if _name in _after:
+                _after.discard(_name)
+                if not _after:
+                    heapq.heappush(_ready, _other)
+
+    return _sorted
+
+
+def plan(hooks, verbose=False):
+    # [(MODE_SOURCE, hook), (MODE_PARALLEL, [hook, ...]), ...]
+    _plan = []
+    for _hook in sort_hooks(hooks, verbose):
+        if _hook.mode == MODE_SOURCE:
+            _plan.append((MODE_SOURCE, _hook))
+        elif _plan and _plan[-1][0] == MODE_PARALLEL:
+            _plan[-1][1].append(_hook)
+        else:
+            _plan.append((MODE_PARALLEL, [_hook]))
+
+    return _plan
+
+
+class HookProcess(object):
+    def __init__(self, hook):
+        self.hook = hook
+        self.output = tempfile.TemporaryFile()
+        self.start = time.time()
+        self.timed_out = False
+        self._killed = None
+
+        self.process = subprocess.Popen(
+            ['/bin/bash', hook.path],
+            stdin=open(os.devnull),
+            stdout=self.output,
+            stderr=subprocess.STDOUT,
+            close_fds=True,
+            preexec_fn=os.setsid
+        )
+
+    def poll(self):
+        _returncode = self.process.poll()
+        if _returncode is not None:
+            return _returncode
+
+        _now = time.time()
+        if not self.timed_out and _now - self.start > self.hook.timeout:
+            self.timed_out = True
+            self._killed = _now
+            self.kill(signal.SIGTERM)
+        elif self._killed and _now - self._killed > KILL_GRACE:
+            self._killed = None
+            self.kill(signal.SIGKILL)
+
+        return None
+
+    def kill(self, signum):
+        try:
+            os.killpg(self.process.pid, signum)
+        except OSError:
+            pass
+
+    def report(self, returncode):
+        # the output of each hook is printed in one piece, once finished
+        self.output.seek(0)
+        sys.stdout.write(self.output.read())
+        self.output.close()
+
+        if self.timed_out:
+            _status = 'timed out after %d s' % self.hook.timeout
+        else:
+            _status = 'exit code %d' % returncode
+
+        sys.stdout.write('Hook %s: %.2f s, %s\n' % (
+            self.hook.name, time.time() - self.start, _status
+        ))
+        sys.stdout.flush()
+
+
+def run_parallel(hooks, jobs):
+    # hooks are already sorted: only the ones before can be waited for
+    _pending = list(hooks)
+    _before = dict(
+        (_hook.name, set(_other.name for _other in hooks[:_index]))
+        for _index, _hook in enumerate(hooks)
+    )
+    _done = set()
+    _running = []
+    _failed = 0
+
+    while _pending or _running:
+        for _hook in list(_pending):
+            if len(_running) >= jobs:
+                break
+
+            if _before[_hook.name].intersection(_hook.after) <= _done:
+                _pending.remove(_hook)
+                _running.append(HookProcess(_hook))
+
+        time.sleep(POLL_INTERVAL)
+
+        for _process in list(_running):
+            _returncode = _process.poll()
+            if _returncode is None:
+                continue
+
+            _running.remove(_process)
+            _done.add(_process.hook.name)
+            _process.report(_returncode)
+            if _returncode != os.EX_OK:
+                _failed += 1
+
+    return _failed
+
+
+def main():
+    parser = optparse.OptionParser(
+        usage='%prog plan DIR | %prog run DIR GROUP'
+    )
+    parser.add_option(
+        '--jobs', '-j',
+        type='int',
+        default=4,
+        help='parallel hooks run at the same time'
+    )
+    options, arguments = parser.parse_args()
+
+    if len(arguments) < 2 or arguments[0] not in ('plan', 'run') \
+            or (arguments[0] == 'run' and len(arguments) != 3):
+        parser.error('wrong arguments')
+
+    if not os.path.isdir(arguments[1]):
+        sys.exit(os.EX_OK)
+
+    _plan = plan(load_hooks(arguments[1]), verbose=arguments[0] == 'plan')
+
+    if arguments[0] == 'plan':
+        for _group, (_mode, _item) in enumerate(_plan):
+            if _mode == MODE_SOURCE:
+                print('source %s' % _item.path)
+            else:
+                print('run %d' % _group)
+        sys.exit(os.EX_OK)
+
+    try:
+        _mode, _hooks = _plan[int(arguments[2])]
+    except (ValueError, IndexError):
+        parser.error('unknown group %s' % arguments[2])
+
+    if _mode != MODE_PARALLEL:
+        parser.error('group %s is not a parallel one' % arguments[2])
+
+    run_parallel(_hooks, max(1, options.jobs))
+
+
+if __name__ == '__main__':
+    main()
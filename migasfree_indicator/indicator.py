@@ -25,62 +25,32 @@ __license__ = 'GPLv3'
 __copyright__ = '(C) 2010-2017 migasfree team'
 
 import os
-import sys
-import threading
-import locale
-import subprocess
-import webbrowser
-import optparse
-import time
-import errno
 
 import gettext
 _ = gettext.gettext
 
+from . import timing
+timing.mark('imports')
+
 from gi import require_version
 require_version('Gtk', '3.0')
 require_version('AppIndicator3', '0.1')
 
 from gi.repository import (
-    Gio,
     GObject,
     Gtk,
     AppIndicator3 as AppIndicator,
 )
 
-version_file = os.path.join(
-    os.path.dirname(os.path.dirname(__file__)),
-    'VERSION'
-)
-if not os.path.exists(version_file):
-    version_file = os.path.join(
-        sys.prefix,
-        'share',
-        'doc',
-        'migasfree-launcher',
-        'VERSION'
-    )
-
-__version__ = open(version_file).read().splitlines()[0]
-
-from migasfree_client.utils import execute
-from migasfree_client.utils import get_config
-from migasfree_client.network import get_gateway
+timing.mark('GI typelibs')
 
+from . import get_version
 from .console import Console
+from .engine import SyncEngine, get_status
+from .jobs import PRIORITY_FORCE
+from .settings import Settings
 
-CONF_FILE = "/etc/migasfree-indicator.conf"
-WAIT_IP_TIMEOUT = 120  # seconds
-DEFAULT_INTERVAL = 24  # hours
-
-
-def has_ip_address():
-    _cont = WAIT_IP_TIMEOUT
-    while (get_gateway() is None or get_gateway() == '') and _cont > 0:
-        time.sleep(1)
-        _cont -= 1
-
-    return get_gateway() != '' and get_gateway() is not None
+timing.mark('modules')
 
 
 class SystrayIconApp(object):
@@ -88,52 +58,88 @@ class SystrayIconApp(object):
     APP_NAME = _('Migasfree Indicator')
     APP_DESCRIPTION = _('Indicator to view and control migasfree client actions')
 
-    SCHEMA = "org.migasfree.console"
-    SHOW_CONSOLE = "show-console"
-
-    CMD_UPGRADE = "sudo migasfree-launcher"
-    CMD_FORCE_UPGRADE = "sudo migasfree-launcher force-upgrade"
     CMD_LABEL = "migasfree-label"
 
-    FIRST_RUN = "/var/tmp/migasfree/first-tags.conf"
-
-    def __init__(self, options):
-        if options.interval:
-            self.interval = options.interval * 3600000
-        else:
-            self.interval = DEFAULT_INTERVAL * 3600000
-
-        if options.support:
-            self.support = options.support
-        else:
-            self.support = ''
-
-        self.is_force_upgrade = (options.force_upgrade is True)
-
-        self.console = Console()
-        if os.path.isfile(self.FIRST_RUN):
-            self.console.show_all()
-
-        self.is_upgrading = False
-
-        self.fore_color = self.get_fore_color()
-        self.icon = 'migasfree-idle-%s' % self.fore_color
-
+    def __init__(self, settings):
+        self.settings = settings
+        self.settings.connect('changed', self.on_settings_changed)
+
+        self.engine = SyncEngine(settings)
+        self.engine.connect('started', self.on_started)
+        self.engine.connect('output', self.on_output)
+        self.engine.connect('progress', self.on_progress)
+        self.engine.connect('finished', self.on_finished)
+        self.engine.connect('first-run', self.on_first_run)
+        self.engine.connect('reboot-required', self.on_reboot_required)
+        self.engine.connect('queue-changed', self.on_queue_changed)
+
+        # the themed icon needs the panel colour: it is set on first idle
+        self.icon = None
+        self._fore_color = None
         self.tray = AppIndicator.Indicator.new(
             self.APP_INDICATOR_ID,
-            self.icon,
+            'migasfree',
             AppIndicator.IndicatorCategory.APPLICATION_STATUS
         )
         self.tray.set_status(AppIndicator.IndicatorStatus.ACTIVE)
         self.tray.set_attention_icon('attention_icon')
-        GObject.idle_add(self.tray.set_icon, self.icon)
+        timing.mark('tray')
 
-        self.mode_console = self.get_console()
+        self._console = None
+        self._reboot = None
+        self.status = None
+
+        self.menu_images = []
         self.make_menu()
+        timing.mark('widgets')
+
+        self.engine.start()
+
+        GObject.idle_add(self.on_first_idle)
+
+    def on_first_idle(self):
+        timing.mark('first idle')
+
+        if self._fore_color is None:
+            self._fore_color = self.get_fore_color()
+        if self.icon is None and not self.engine.is_upgrading \
+                and not self.engine.reboot_pending:
+            self.update_tray_icon(os.EX_OK)
+        self.load_menu_images()
+
+        from .status import StatusService
+        self.status = StatusService(self.engine)
+
+        timing.report()
+
+        return False
+
+    @property
+    def console(self):
+        if self._console is None:
+            self._console = Console(
+                max_lines=self.settings.scrollback_lines,
+                max_bytes=self.settings.scrollback_bytes
+            )
+
+        return self._console
 
-        self.update_system()
-        GObject.timeout_add(self.interval, self.update_system)
-        GObject.timeout_add(10000, self.check_reboot)
+    @property
+    def fore_color(self):
+        if self._fore_color is None:
+            self._fore_color = self.get_fore_color()
+
+        return self._fore_color
+
+    def on_settings_changed(self, settings, key):
+        if key == 'show_console':
+            self.menu_mode_console.set_active(settings.show_console)
+        elif key == 'support':
+            self.menu_support.set_visible(bool(settings.support))
+        elif key == 'scrollback_lines' and self._console:
+            self.console.max_lines = settings.scrollback_lines
+        elif key == 'scrollback_bytes' and self._console:
+            self.console.max_bytes = settings.scrollback_bytes
 
     @staticmethod
     def get_fore_color():
@@ -149,15 +155,21 @@ class SystrayIconApp(object):
     def make_menu(self):
         self.menu = Gtk.Menu()
 
+        # queue state, only visible while upgrading
+        self.menu_queue = Gtk.MenuItem('')
+        self.menu_queue.set_sensitive(False)
+        self.menu.append(self.menu_queue)
+
+        self.menu_cancel = Gtk.MenuItem(_('Cancel queued upgrade'))
+        self.menu_cancel.connect('activate', self.cancel_upgrade)
+        self.menu.append(self.menu_cancel)
+
+        # while upgrading, a forced upgrade is queued to run afterwards
         self.menu_force_upgrade = Gtk.ImageMenuItem(
             _('Force Upgrade')
         )
-        self.menu_force_upgrade.set_image(
-            self.get_image("migasfree-force-upgrade")
-        )
-        GObject.idle_add(
-            self.menu_force_upgrade.set_sensitive,
-            not self.is_upgrading
+        self.menu_images.append(
+            (self.menu_force_upgrade, "migasfree-force-upgrade")
         )
         self.menu_force_upgrade.show()
         self.menu_force_upgrade.connect('activate', self.force_upgrade)
@@ -166,54 +178,49 @@ class SystrayIconApp(object):
         self.menu.append(Gtk.SeparatorMenuItem())
 
         _menu_console = Gtk.ImageMenuItem(_('Console'))
-        _menu_console.set_image(self.get_image("migasfree-console"))
+        self.menu_images.append((_menu_console, "migasfree-console"))
         _menu_console.show()
         _menu_console.connect('activate', self.show_console)
         self.menu.append(_menu_console)
 
-        _menu_mode_console = Gtk.CheckMenuItem(_('Show console always'))
-        _menu_mode_console.connect('activate', self.on_show_console)
-        _menu_mode_console.set_active(self.mode_console)
-        self.menu.append(_menu_mode_console)
+        self.menu_mode_console = Gtk.CheckMenuItem(_('Show console always'))
+        self.menu_mode_console.set_active(self.settings.show_console)
+        self.menu_mode_console.connect('activate', self.on_show_console)
+        self.menu.append(self.menu_mode_console)
 
         self.menu.append(Gtk.SeparatorMenuItem())
 
         _label_id = Gtk.ImageMenuItem(_('Identification label'))
-        _label_id.set_image(self.get_image("migasfree-label"))
+        self.menu_images.append((_label_id, "migasfree-label"))
         _label_id.show()
         _label_id.connect('activate', self.show_label_id)
         self.menu.append(_label_id)
 
-        if self.support:
-            _support = Gtk.ImageMenuItem(_('Support'))
-            _support.set_image(self.get_image("migasfree-support"))
-            _support.show()
-            _support.connect('activate', self.show_support)
-            self.menu.append(_support)
+        self.menu_support = Gtk.ImageMenuItem(_('Support'))
+        self.menu_images.append((self.menu_support, "migasfree-support"))
+        self.menu_support.connect('activate', self.show_support)
+        self.menu.append(self.menu_support)
 
         self.menu.append(Gtk.SeparatorMenuItem())
 
         _about = Gtk.ImageMenuItem(_('About'))
-        _about.set_image(self.get_image('help-about'))
+        self.menu_images.append((_about, 'help-about'))
         _about.show()
         _about.connect('activate', self.show_about)
         self.menu.append(_about)
 
         self.menu.show_all()
+        self.menu_support.set_visible(bool(self.settings.support))
+        self.on_queue_changed(self.engine)
         self.tray.set_menu(self.menu)
 
-    def set_console(self, value):
-        _settings = Gio.Settings.new(self.SCHEMA)
-        _settings.set_boolean(self.SHOW_CONSOLE, value)
-
-    def get_console(self):
-        _settings = Gio.Settings.new(self.SCHEMA)
-
-        return _settings.get_boolean(self.SHOW_CONSOLE)
-
     def on_show_console(self, widget):
-        self.set_console(widget.get_active())
-        self.mode_console = widget.get_active()
+        self.settings.show_console = widget.get_active()
+
+    def load_menu_images(self):
+        for _item, _name in self.menu_images:
+            _item.set_image(self.get_image(_name))
+        self.menu_images = []
 
     @staticmethod
     def get_image(name):
@@ -232,7 +239,9 @@ class SystrayIconApp(object):
         os.system(self.CMD_LABEL)
 
     def show_support(self, widget):
-        webbrowser.open(self.support)
+        import webbrowser
+
+        webbrowser.open(self.settings.support)
 
     def show_about(self, widget):
         about = Gtk.AboutDialog()
@@ -243,7 +252,7 @@ class SystrayIconApp(object):
         about.set_icon_name('migasfree')
         about.set_logo_icon_name('migasfree')
         about.set_name(__file__)
-        about.set_version(__version__)
+        about.set_version(get_version())
         about.set_copyright(__copyright__)
         about.set_authors(__author__)
         about.set_website("http://migasfree.org/")
@@ -252,189 +261,90 @@ class SystrayIconApp(object):
         about.run()
         about.destroy()
 
-    def upgrade(self, widget):
-        self.run_command(self.CMD_UPGRADE)
-
     def force_upgrade(self, widget):
-        self.run_command(self.CMD_FORCE_UPGRADE)
-
-    def update_system(self):
-        if not self.is_upgrading:
-            if self.is_force_upgrade:
-                self.force_upgrade(None)
-            else:
-                self.upgrade(None)
-
-        return True
-
-    def cmd_reboot(self):
-        ret, _, _ = execute('which ck-list-sessions')
-        if ret == 0:
-            cmd = 'dbus-send --system --print-reply '
-            '--dest=org.freedesktop.ConsoleKit '
-            '/org/freedesktop/ConsoleKit/Manager '
-            'org.freedesktop.ConsoleKit.Manager.Restart'
-        else:
-            ret, _, _ = execute('which systemctl')
-            if ret == 0:
-                cmd = 'systemctl reboot -i'
-            else:
-                cmd = 'dbus-send --system --print-reply '
-                '--dest=org.freedesktop.login1 '
-                '/org/freedesktop/login1 '
-                '"org.freedesktop.login1.Manager.Reboot" boolean:true'
-
-        execute(cmd, interactive=True, verbose=True)
-
-    def check_reboot(self):
-        if not self.is_upgrading \
-                and os.path.isfile('/var/run/reboot-required'):
-            GObject.idle_add(self.tray.set_icon, 'dialog-warning')
-
-            _menu_reboot = Gtk.ImageMenuItem(
-                _('Restart your computer to finish updating the system')
-            )
-            _menu_reboot.set_image(self.get_image('dialog-warning'))
-            _menu_reboot.show()
-            _menu_reboot.connect('activate', self.reboot_computer)
-            self.menu.append(_menu_reboot)
+        self.engine.force_upgrade()
 
-            GObject.idle_add(self.menu_force_upgrade.set_sensitive, False)
+    def on_reboot_required(self, engine):
+        GObject.idle_add(self.tray.set_icon, 'dialog-warning')
 
-            return False
+        _menu_reboot = Gtk.ImageMenuItem(
+            _('Restart your computer to finish updating the system')
+        )
+        _menu_reboot.set_image(self.get_image('dialog-warning'))
+        _menu_reboot.show()
+        _menu_reboot.connect('activate', self.reboot_computer)
+        self.menu.append(_menu_reboot)
 
-        return True
+        GObject.idle_add(self.menu_force_upgrade.set_sensitive, False)
 
     def reboot_computer(self, widget):
-        self.cmd_reboot()
+        from .reboot import RebootBackend
 
-    def run_command(self, command):
-        self.console.textbuffer.set_text('')
-        if self.mode_console:
-            self.console.show_all()
+        if self._reboot is None:
+            self._reboot = RebootBackend()
+        self._reboot.reboot(self.on_reboot_error)
 
-        thread = threading.Thread(
-            target=self.read_output,
-            args=(command,)
-        )
-        thread.setDaemon(True)
-        thread.start()
+    def on_reboot_error(self, message):
+        self.console.append(_('Restart failed: %s') % message + '\n')
+        self.console.show_all()
 
-    def read_output(self, command):
-        self.is_upgrading = True
+    def on_started(self, engine, command):
+        self.console.clear()
+        if self.settings.show_console:
+            self.console.show_all()
 
-        GObject.idle_add(self.menu_force_upgrade.set_sensitive, False)
-        self.console.timeout_id = GObject.timeout_add(
-            50,
-            self.console.on_timeout,
-            None
-        )
+        self.tray.set_icon('migasfree')
 
-        GObject.idle_add(self.tray.set_icon, 'migasfree')
+    def on_output(self, engine, text):
+        self.console.append(text)
 
-        _process = subprocess.Popen(
-            command.split(" "),
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT
-        )
+    def on_progress(self, engine, fraction, label):
+        self.console.set_progress(fraction, label)
+
+    def on_finished(self, engine, return_code):
+        self.update_tray_icon(return_code)
+        self.console.set_progress(0, '')
 
-        while _process.returncode is None:
-            try:
-                _line = _process.stdout.readline()
-            except:
-                _line = ''
+    def on_queue_changed(self, engine):
+        _running = engine.queue.running
+        _pending = engine.queue.pending
 
-            if not _line and _process.poll() is not None:
-                break
+        if _pending:
+            self.menu_queue.set_label(_('Upgrading, forced upgrade queued'))
+        elif _running and _running.priority == PRIORITY_FORCE:
+            self.menu_queue.set_label(_('Forced upgrade in progress'))
+        else:
+            self.menu_queue.set_label(_('Upgrade in progress'))
 
-            _line = self.clean_text(_line)
-            GObject.idle_add(self.add_text_to_console, _line)
+        self.menu_queue.set_visible(_running is not None)
+        self.menu_cancel.set_visible(_pending is not None)
 
-        self.update_tray_icon(_process.returncode)
-        self.is_upgrading = False
-        GObject.idle_add(self.menu_force_upgrade.set_sensitive, True)
-        self.console.progress.set_fraction(0)
+    def cancel_upgrade(self, widget):
+        self.engine.cancel()
 
-        if self.console.timeout_id:
-            GObject.source_remove(self.console.timeout_id)
-            self.console.timeout_id = 0
+    def on_first_run(self, engine):
+        self.console.show_all()
 
     def update_tray_icon(self, return_code):
-        if return_code == errno.ECONNREFUSED:
-            self.icon = 'migasfree-error-%s' % self.fore_color
-        elif return_code != os.EX_OK:
-            self.icon = 'migasfree-warning-%s' % self.fore_color
-        else:
-            self.icon = 'migasfree-idle-%s' % self.fore_color
+        self.icon = 'migasfree-%s-%s' % (
+            get_status(return_code),
+            self.fore_color
+        )
 
         GObject.idle_add(self.tray.set_icon, self.icon)
 
-    @staticmethod
-    def clean_text(text):
-        return text.replace("\033[92m", "").replace(
-            "\033[91m", ""
-        ).replace("\033[32m", "").replace("\033[0m", "")
-
-    def add_text_to_console(self, line):
-        _encoding = locale.getpreferredencoding()
-        _utf8conv = lambda x: unicode(x, _encoding).encode('utf8')
-
-        _iterator = self.console.textbuffer.get_end_iter()
-        self.console.textbuffer.place_cursor(_iterator)
-        self.console.textbuffer.insert(_iterator, _utf8conv(line))
-        self.console.textview.scroll_to_mark(
-            self.console.textbuffer.get_insert(),
-            0.1, False, 0, 0
-        )
-
     def run(self):
         GObject.threads_init()
         Gtk.main()
 
 
-def main():
-    locale.setlocale(locale.LC_ALL, '.'.join(locale.getdefaultlocale()))
-    gettext.textdomain('migasfree-launcher')
-
-    config = get_config(CONF_FILE, 'indicator')
-    if isinstance(config, dict):
-        config = {}
-
-    if not has_ip_address():
-        print(_('No network access'))
-        sys.exit(1)
-
-    parser = optparse.OptionParser(
-        description=__file__,
-        prog=__file__,
-        version=__version__,
-        usage='%prog options'
-    )
-
-    parser.add_option(
-        "--force-upgrade",
-        "-a",
-        action="store_true",
-        help=_('Force Upgrade'),
-        default=config.get('force_upgrade', False),
-    )
-    parser.add_option(
-        "--interval",
-        "-i",
-        type="int",
-        default=config.get('interval', DEFAULT_INTERVAL),
-    )
-    parser.add_option(
-        "--support",
-        "-s",
-        action="store",
-        default=config.get('support', ''),
-    )
-
-    options, arguments = parser.parse_args()
-
-    SystrayIconApp(options).run()
+def main(options):
+    settings = Settings(options)
+    timing.mark('settings')
+
+    SystrayIconApp(settings).run()
 
 
 if __name__ == "__main__":
-    main()
+    from migasfree_indicator import command_line
+    command_line.main()
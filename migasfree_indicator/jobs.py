@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 migasfree team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+PRIORITY_SCHEDULED = 0
+PRIORITY_FORCE = 1
+
+# what push() did with a request
+STARTED = 'started'
+QUEUED = 'queued'
+MERGED = 'merged'  # into the pending job
+COVERED = 'covered'  # by the running job
+
+
+class Job(object):
+    def __init__(self, command, priority=PRIORITY_SCHEDULED):
+        self.command = command
+        self.priority = priority
+        self.requests = 1
+
+    def __repr__(self):
+        return '<Job %s (%d) x%d>' % (self.command, self.priority, self.requests)
+
+
+# one running job and at most one pending follow-up: requests are never
+# dropped, but never pile up either
+#  * a request no more urgent than the running job is covered by it
+#  * otherwise it waits as the follow-up; later requests are merged into
+#    it, which takes the command of the most urgent one
+class JobQueue(object):
+    def __init__(self):
+        self.running = None
+        self.pending = None
+
+    def push(self, job):
+        if self.running is None:
+            self.running = job
+            return STARTED
+
+        if job.priority <= self.running.priority:
+            self.running.requests += 1
+            return COVERED
+
+        if self.pending is None:
+            self.pending = job
+            return QUEUED
+
+        self.pending.requests += job.requests
+        if job.priority > self.pending.priority:
+            self.pending.priority = job.priority
+            self.pending.command = job.command
+
+        return MERGED
+
+    def done(self):
+        # the running job has finished: returns the next one, if any
+        self.running, self.pending = self.pending, None
+
+        return self.running
+
+    def cancel(self):
+        # only the follow-up: the running sync can not be safely interrupted
+        _job, self.pending = self.pending, None
+
+        return _job
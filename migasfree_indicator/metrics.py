@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 migasfree team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Per phase events of the sync pipeline: every event (phase, run id,
+# start, end, duration, exit code, output bytes if counted) is appended
+# to a JSON lines history, and the launcher ones are also summarized in a
+# textfile for the Prometheus node exporter textfile collector: a
+# duration histogram per phase, plus the exit code, output size and end
+# time of the last run of every phase.
+#
+# migasfree-launcher appends its phases to a file while it runs, as JSON
+# lines (phase, start, end, exit code), and folds them in at the end with
+# a single call, instead of starting an interpreter per phase.
+#
+# Usage (from migasfree-launcher):
+#   migasfree-launcher-metrics fold EVENTS_FILE
+
+import os
+import sys
+import json
+import errno
+import optparse
+
+HISTORY_FILE = '/var/lib/migasfree-launcher/metrics.jsonl'
+STATE_FILE = '/var/lib/migasfree-launcher/metrics.json'
+TEXTFILE = '/var/lib/prometheus/node-exporter/migasfree_launcher.prom'
+
+USER_HISTORY_FILE = os.path.join(
+    os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')),
+    'migasfree-indicator',
+    'metrics.jsonl'
+)
+
+MAX_HISTORY_SIZE = 1024 * 1024  # bytes, then rotated to .1
+BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)  # seconds
+PREFIX = 'migasfree_launcher_phase'
+
+
+def make_event(phase, start, end, exit_code=None, size=None, **extra):
+    _event = {
+        'phase': phase,
+        'run': os.environ.get('MIGASFREE_RUN_ID', ''),
+        'start': round(start, 3),
+        'end': round(end, 3),
+        'duration': round(end - start, 3),
+        'exit_code': exit_code,
+        'bytes': size,
+    }
+    _event.update(extra)
+
+    return _event
+
+
+def makedirs(path):
+    try:
+        os.makedirs(os.path.dirname(path))
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+
+
+def write_atomic(path, content):
+    makedirs(path)
+    with open(path + '.tmp', 'w') as _handle:
+        _handle.write(content)
+    os.rename(path + '.tmp', path)
+
+
+def append_event(event, path=HISTORY_FILE):
+    try:
+        makedirs(path)
+        if os.path.exists(path) and os.path.getsize(path) > MAX_HISTORY_SIZE:
+            os.rename(path, path + '.1')
+        with open(path, 'a') as _handle:
+            _handle.write(json.dumps(event, sort_keys=True) + '\n')
+    except (IOError, OSError):
+        pass
+
+
+# cumulative per phase counters, kept apart from the history so that they
+# never go down when the history is rotated
+def load_state(path=STATE_FILE):
+    try:
+        with open(path) as _handle:
+            _state = json.load(_handle)
+    except (IOError, OSError, ValueError):
+        return {}
+
+    return _state if isinstance(_state, dict) else {}
+
+
+def update_state(state, event):
+    _phase = state.setdefault(event['phase'], {
+        'buckets': [0] * len(BUCKETS),
+        'count': 0,
+        'sum': 0.0,
+    })
+
+    for _index, _bound in enumerate(BUCKETS):
+        if event['duration'] <= _bound:
+            _phase['buckets'][_index] += 1
+    _phase['count'] += 1
+    _phase['sum'] += event['duration']
+    _phase['last'] = event
+
+    return state
+
+
+def textfile(state):
+    _lines = [
+        '# HELP %s_duration_seconds Duration of the sync phases.' % PREFIX,
+        '# TYPE %s_duration_seconds histogram' % PREFIX,
+    ]
+    for _name in sorted(state):
+        _phase = state[_name]
+        for _bound, _count in zip(BUCKETS, _phase['buckets']):
+            _lines.append('%s_duration_seconds_bucket{phase="%s",le="%s"} %d' % (
+                PREFIX, _name, _bound, _count
+            ))
+        _lines.append('%s_duration_seconds_bucket{phase="%s",le="+Inf"} %d' % (
+            PREFIX, _name, _phase['count']
+        ))
+        _lines.append('%s_duration_seconds_sum{phase="%s"} %.3f' % (
+            PREFIX, _name, _phase['sum']
+        ))
+        _lines.append('%s_duration_seconds_count{phase="%s"} %d' % (
+            PREFIX, _name, _phase['count']
+        ))
+
+    for _metric, _key, _help in (
+        ('last_duration_seconds', 'duration', 'Duration of the last run.'),
+        ('last_exit_code', 'exit_code', 'Exit code of the last run.'),
+        ('last_output_bytes', 'bytes', 'Output size of the last run.'),
+        ('last_end_timestamp_seconds', 'end', 'End time of the last run.'),
+    ):
+        _lines.append('# HELP %s_%s %s' % (PREFIX, _metric, _help))
+        _lines.append('# TYPE %s_%s gauge' % (PREFIX, _metric))
+        for _name in sorted(state):
+            _value = state[_name].get('last', {}).get(_key)
+            if _value is not None:
+                _lines.append('%s_%s{phase="%s"} %r' % (
+                    PREFIX, _metric, _name, _value
+                ))
+
+    return '\n'.join(_lines) + '\n'
+
+
+def record(events, history=HISTORY_FILE, state_file=STATE_FILE,
+           text_file=TEXTFILE):
+    _state = load_state(state_file)
+    for _event in events:
+        append_event(_event, history)
+        _state = update_state(_state, _event)
+
+    try:
+        write_atomic(state_file, json.dumps(_state, sort_keys=True))
+        if os.path.isdir(os.path.dirname(text_file)):
+            write_atomic(text_file, textfile(_state))
+    except (IOError, OSError):
+        pass
+
+
+def read_events(path):
+    # the raw phases written by migasfree-launcher, as complete events
+    _events = []
+    try:
+        with open(path) as _handle:
+            for _line in _handle:
+                try:
+                    _raw = json.loads(_line)
+                    _events.append(make_event(
+                        _raw['phase'],
+                        float(_raw['start']),
+                        float(_raw['end']),
+                        _raw.get('exit_code')
+                    ))
+                except (ValueError, TypeError, KeyError):
+                    pass  # cut by a crash
+    except (IOError, OSError):
+        pass
+
+    return _events
+
+
+def main():
+    parser = optparse.OptionParser(usage='%prog fold EVENTS_FILE')
+    options, arguments = parser.parse_args()
+
+    if len(arguments) == 2 and arguments[0] == 'fold':
+        record(read_events(arguments[1]))
+        sys.exit(os.EX_OK)
+
+    parser.error('wrong arguments')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 migasfree team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import time
+
+from gi.repository import Gio, GObject
+
+from migasfree_client.network import get_gateway
+
+WAIT_IP_TIMEOUT = 120  # seconds
+
+
+# calls on_ready(elapsed_seconds) once, as soon as a default route exists
+# Gio.NetworkMonitor is fed by netlink route notifications, so nothing is
+# polled while waiting; monitor and gateway can be replaced by fakes
+class NetworkWatcher(object):
+    def __init__(self, on_ready, on_timeout=None, timeout=WAIT_IP_TIMEOUT,
+                 monitor=None, gateway=get_gateway):
+        self._on_ready = on_ready
+        self._on_timeout = on_timeout
+        self._timeout = timeout
+        self._monitor = monitor or Gio.NetworkMonitor.get_default()
+        self._gateway = gateway
+
+        self._handler_id = 0
+        self._timeout_id = 0
+        self.start_time = None
+        self.is_ready = False
+
+    def start(self):
+        self.start_time = time.time()
+        if self.check():
+            return
+
+        self._handler_id = self._monitor.connect(
+            'network-changed',
+            self.on_network_changed
+        )
+        if self._on_timeout:
+            self._timeout_id = GObject.timeout_add_seconds(
+                self._timeout,
+                self.on_expired
+            )
+
+    def stop(self):
+        if self._handler_id:
+            self._monitor.disconnect(self._handler_id)
+            self._handler_id = 0
+
+        if self._timeout_id:
+            GObject.source_remove(self._timeout_id)
+            self._timeout_id = 0
+
+    def is_metered(self):
+        # GLib >= 2.46
+        return bool(getattr(self._monitor, 'get_network_metered', bool)())
+
+    def on_network_changed(self, monitor, available):
+        if available:
+            self.check()
+
+    def on_expired(self):
+        self._timeout_id = 0
+        self._on_timeout()
+
+        return False
+
+    def check(self):
+        if self.is_ready:
+            return True
+
+        if not self._gateway():
+            return False
+
+        self.is_ready = True
+        self.stop()
+        self._on_ready(time.time() - self.start_time)
+
+        return True
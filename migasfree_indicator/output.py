@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 migasfree team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import threading
+
+from gi.repository import GObject
+
+FLUSH_INTERVAL = 16  # milliseconds (one frame at 60 Hz)
+MAX_CHUNK_SIZE = 64 * 1024  # bytes
+
+
+# gathers text written from any thread and hands it to the main loop in
+# chunks: at most once per FLUSH_INTERVAL or as soon as MAX_CHUNK_SIZE is pending
+class OutputBuffer(object):
+    def __init__(self, callback, interval=FLUSH_INTERVAL,
+                 max_size=MAX_CHUNK_SIZE):
+        self._callback = callback
+        self._interval = interval
+        self._max_size = max_size
+
+        self._lock = threading.Lock()
+        self._chunks = []
+        self._size = 0
+        self._scheduled = False
+        self._urgent = False
+
+    def write(self, text):
+        if not text:
+            return
+
+        with self._lock:
+            self._chunks.append(text)
+            self._size += len(text)
+
+            if self._size >= self._max_size:
+                if not self._urgent:
+                    self._urgent = True
+                    GObject.idle_add(self._flush)
+            elif not self._scheduled:
+                self._scheduled = True
+                GObject.timeout_add(self._interval, self._flush)
+
+    def flush(self):
+        with self._lock:
+            if not self._urgent:
+                self._urgent = True
+                GObject.idle_add(self._flush)
+
+    def flush_now(self):
+        # only from the main loop: the pending text is handed over right away
+        self._flush()
+
+    def _flush(self):
+        with self._lock:
+            _text = ''.join(self._chunks)
+            self._chunks = []
+            self._size = 0
+            self._scheduled = False
+            self._urgent = False
+
+        if _text:
+            self._callback(_text)
+
+        return False
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 migasfree team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Resources given to the sync process tree, so that dpkg does not stall
+# the desktop. Read from the [indicator] section of the conf file by the
+# helper (as root) and by the indicator; no GObject needed.
+
+import os
+
+from distutils.spawn import find_executable
+
+CONF_FILE = '/etc/migasfree-indicator.conf'
+POWER_SUPPLY_PATH = '/sys/class/power_supply'
+
+# ionice arguments
+IONICE_CLASSES = {
+    'none': [],
+    'best-effort': ['-c', '2', '-n', '7'],  # lowest best-effort priority
+    'idle': ['-c', '3'],  # only when no one else uses the disk
+}
+
+# conf file key: (type, default)
+OPTIONS = {
+    'nice': (int, 10),  # 0 keeps the normal priority
+    'ionice': (str, 'best-effort'),  # one of IONICE_CLASSES
+    'cpu_weight': (int, 0),  # systemd scope CPUWeight (1-10000), 0: none
+    'io_weight': (int, 0),  # systemd scope IOWeight (1-10000), 0: none
+}
+
+
+class ResourcePolicy(object):
+    def __init__(self, nice=0, ionice='none', cpu_weight=0, io_weight=0):
+        self.nice = max(0, min(nice, 19))
+        self.ionice = ionice if ionice in IONICE_CLASSES else 'none'
+        self.cpu_weight = cpu_weight
+        self.io_weight = io_weight
+
+    def scope_properties(self, scope):
+        # a transient scope needs root and a running systemd
+        if not scope or not find_executable('systemd-run') \
+                or not os.path.isdir('/run/systemd/system'):
+            return []
+
+        _properties = []
+        if self.cpu_weight:
+            _properties.append('CPUWeight=%d' % self.cpu_weight)
+        if self.io_weight:
+            _properties.append('IOWeight=%d' % self.io_weight)
+
+        return _properties
+
+    def wrap(self, command, scope=False):
+        _command = list(command)
+
+        if IONICE_CLASSES[self.ionice] and find_executable('ionice'):
+            _command = ['ionice'] + IONICE_CLASSES[self.ionice] + _command
+
+        if self.nice and find_executable('nice'):
+            _command = ['nice', '-n', str(self.nice)] + _command
+
+        _properties = self.scope_properties(scope)
+        if _properties:
+            _prefix = ['systemd-run', '--scope', '--quiet']
+            for _property in _properties:
+                _prefix.extend(['-p', _property])
+            _command = _prefix + ['--'] + _command
+
+        return _command
+
+    def describe(self, scope=False):
+        _items = [
+            'nice %d' % self.nice,
+            'IO class %s' % self.ionice,
+        ]
+        _items.extend(self.scope_properties(scope))
+
+        return 'Resource policy: %s\n' % ', '.join(_items)
+
+
+def read_options(options, path=CONF_FILE):
+    # options: {key: (type, default)}, as OPTIONS or settings.OPTIONS
+    # the only reader of the conf file
+    from migasfree_client.utils import get_config
+
+    _config = get_config(path, 'indicator')
+    if not isinstance(_config, dict):
+        _config = {}
+
+    _values = {}
+    for _key, (_type, _default) in options.items():
+        try:
+            _values[_key] = _type(_config.get(_key, _default))
+        except (TypeError, ValueError):
+            _values[_key] = _default
+
+    return _values
+
+
+def read_policy(path=CONF_FILE):
+    return ResourcePolicy(**read_options(OPTIONS, path))
+
+
+def on_battery(path=POWER_SUPPLY_PATH):
+    # no mains adapter online and at least one system battery
+    def _read(name, key):
+        try:
+            with open(os.path.join(path, name, key)) as _handle:
+                return _handle.read().strip()
+        except (IOError, OSError):
+            return ''
+
+    try:
+        _names = os.listdir(path)
+    except OSError:
+        return False
+
+    _battery = False
+    for _name in _names:
+        _type = _read(_name, 'type')
+        if _type == 'Mains' and _read(_name, 'online') == '1':
+            return False
+        if _type == 'Battery' and _read(_name, 'scope') != 'Device':
+            _battery = True
+
+    return _battery
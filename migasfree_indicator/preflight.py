@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 migasfree team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# "Anything new?" check run by migasfree-launcher before a scheduled sync
+# (opt-in, preflight_url in /etc/migasfree-indicator.conf): a conditional
+# request for that URL tells whether it has changed since the last
+# successful sync, and if it has not, the whole pipeline is skipped.
+#
+# The version stamp of the URL is its ETag, else its Last-Modified date,
+# else a hash of its content. "check" keeps the stamp it got as pending,
+# and "commit" (after a successful sync) makes it the synced one, so a
+# failed sync is never taken as up to date. Any error means "changed",
+# and a full sync runs anyway once preflight_max_age has passed.
+#
+# Usage (from migasfree-launcher):
+#   migasfree-launcher-preflight check SERVER (exit code UNCHANGED: skip)
+#   migasfree-launcher-preflight commit
+
+import sys
+import json
+import time
+import socket
+import urllib2
+import hashlib
+import httplib
+import optparse
+
+from .metrics import load_state, write_atomic
+from .policy import read_options
+
+STATE_FILE = '/var/lib/migasfree-launcher/preflight.json'
+READ_SIZE = 64 * 1024  # bytes
+
+UNCHANGED = 10  # exit code of "check" when the sync can be skipped
+
+# conf file key: (type, default)
+OPTIONS = {
+    'preflight_url': (str, ''),  # %(server)s is replaced, empty: disabled
+    'preflight_max_age': (int, 168),  # hours between full syncs anyway
+    'preflight_timeout': (int, 10),  # seconds
+}
+
+
+def fetch(url, stamp=None, timeout=10):
+    # returns the version stamp of url, or the same stamp if the server
+    # answers the conditional request with "304 Not Modified"
+    _request = urllib2.Request(url)
+    if stamp and stamp.startswith('etag:'):
+        _request.add_header('If-None-Match', stamp[len('etag:'):])
+    elif stamp and stamp.startswith('modified:'):
+        _request.add_header('If-Modified-Since', stamp[len('modified:'):])
+
+    try:
+        _response = urllib2.urlopen(_request, timeout=timeout)
+    except urllib2.HTTPError as e:
+        if e.code == httplib.NOT_MODIFIED:
+            return stamp
+        raise
+
+    try:
+        _etag = _response.info().getheader('ETag')
+        if _etag:
+            return 'etag:%s' % _etag
+
+        _modified = _response.info().getheader('Last-Modified')
+        if _modified:
+            return 'modified:%s' % _modified
+
+        _hash = hashlib.sha1()
+        while True:
+            _chunk = _response.read(READ_SIZE)
+            if not _chunk:
+                break
+            _hash.update(_chunk)
+
+        return 'sha1:%s' % _hash.hexdigest()
+    finally:
+        _response.close()
+
+
+def check(server, options, path=STATE_FILE):
+    # returns True when the sync can be skipped
+    _state = load_state(path)
+    _state.pop('pending', None)
+
+    if not options['preflight_url']:
+        return False
+
+    try:
+        _state['pending'] = fetch(
+            options['preflight_url'] % {'server': server},
+            _state.get('stamp'),
+            options['preflight_timeout']
+        )
+    except (IOError, ValueError, httplib.HTTPException, socket.error) as e:
+        print('Preflight: %s' % e)
+
+    try:
+        write_atomic(path, json.dumps(_state, sort_keys=True))
+    except (IOError, OSError):
+        return False
+
+    _age = time.time() - _state.get('synced', 0)
+
+    return 'pending' in _state and _state['pending'] == _state.get('stamp') \
+        and 0 <= _age < options['preflight_max_age'] * 3600
+
+
+def commit(path=STATE_FILE):
+    _state = load_state(path)
+    if 'pending' not in _state:
+        return
+
+    _state['stamp'] = _state.pop('pending')
+    _state['synced'] = time.time()
+    try:
+        write_atomic(path, json.dumps(_state, sort_keys=True))
+    except (IOError, OSError):
+        pass
+
+
+def main():
+    parser = optparse.OptionParser(
+        usage='%prog check SERVER | %prog commit'
+    )
+    options, arguments = parser.parse_args()
+
+    if len(arguments) == 2 and arguments[0] == 'check':
+        if check(arguments[1], read_options(OPTIONS)):
+            sys.exit(UNCHANGED)
+        sys.exit(0)
+
+    if arguments == ['commit']:
+        commit()
+        sys.exit(0)
+
+    parser.error('wrong arguments')
+
+
+if __name__ == '__main__':
+    main()
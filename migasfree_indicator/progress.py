@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 migasfree team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import re
+
+import gettext
+_ = gettext.gettext
+
+STARTING = 'starting'
+REGISTERING = 'registering'
+SYNCHRONIZING = 'synchronizing'
+DOWNLOADING = 'downloading'
+INSTALLING = 'installing'
+FINISHING = 'finishing'
+
+# phase: (first fraction, last fraction)
+PHASES = {
+    STARTING: (0.0, 0.0),
+    REGISTERING: (0.0, 0.1),
+    SYNCHRONIZING: (0.1, 0.3),
+    DOWNLOADING: (0.3, 0.6),
+    INSTALLING: (0.6, 0.95),
+    FINISHING: (0.95, 1.0),
+}
+
+LABELS = {
+    STARTING: _('Starting'),
+    REGISTERING: _('Registering'),
+    SYNCHRONIZING: _('Synchronizing'),
+    DOWNLOADING: _('Downloading'),
+    INSTALLING: _('Installing'),
+    FINISHING: _('Finishing'),
+}
+
+# printed by migasfree-launcher (on cleaned, complete lines)
+_MARKERS = re.compile(
+    r'^(?:(Report tags:)|(Synchronizing\.\.\.)|(-{32})$)',
+    re.MULTILINE
+)
+
+# percentages drawn by apt (downloads) and dpkg (status line), on raw data
+_PERCENTAGES = re.compile(
+    r'(?:^|\r)(\d{1,3})% \[|Progress: \[\s*(\d{1,3})%\]',
+    re.MULTILINE
+)
+
+
+# turns the launcher output into a phase and a fraction that only grows
+# feed() returns True when the visible state (phase or whole percent)
+# has changed, so the progress bar is redrawn only then
+class ProgressModel(object):
+    def __init__(self):
+        self.phase = STARTING
+        self.fraction = 0.0
+
+    @property
+    def label(self):
+        return LABELS[self.phase]
+
+    def feed(self, data, text):
+        _state = (self.phase, int(self.fraction * 100))
+
+        for _tags, _sync, _separator in _MARKERS.findall(text):
+            if _tags:
+                self.set_phase(REGISTERING)
+            elif _sync:
+                self.set_phase(SYNCHRONIZING)
+            elif self.phase != STARTING and self.phase != REGISTERING:
+                self.set_phase(FINISHING)
+
+        if self.phase != FINISHING:
+            for _download, _install in _PERCENTAGES.findall(data):
+                if _download:
+                    self.set_phase(DOWNLOADING, int(_download))
+                else:
+                    self.set_phase(INSTALLING, int(_install))
+
+        return (self.phase, int(self.fraction * 100)) != _state
+
+    def set_phase(self, phase, percent=0):
+        _first, _last = PHASES[phase]
+        _fraction = _first + (_last - _first) * min(percent, 100) / 100.0
+
+        if _fraction >= self.fraction:
+            self.phase = phase
+            self.fraction = _fraction
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 migasfree team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# First run and node change of migasfree-launcher: register the computer,
+# report its tags and update it in one process, on top of the migasfree
+# client command classes. MigasFreeClient reads the client configuration
+# and opens the server session (its UrlRequest) once; the MigasFreeTags
+# command shares both instead of building its own.
+#
+# Every step goes on even if the previous one failed (as the launcher
+# did), reports its own time and exit code and is appended to the
+# launcher events file; the exit code is the update one.
+#
+# Usage (from migasfree-launcher):
+#   migasfree-launcher-provision [--force-upgrade] [--events FILE] [TAG...]
+# exits with UNAVAILABLE, having run nothing, when the client does not
+# have the methods used here (see REQUIRED): the launcher then runs the
+# separate commands
+
+import os
+import sys
+import json
+import time
+import inspect
+import optparse
+
+UNAVAILABLE = 199
+
+SEPARATOR = '-' * 32
+
+# (module, class): methods used, with their arguments besides self
+REQUIRED = {
+    ('client', 'MigasFreeClient'): {
+        '_init_url_request': 0,
+        '_auto_register': 0,  # registers with no questions asked
+        '_update_system': 0,
+    },
+    ('tags', 'MigasFreeTags'): {
+        '_set_tags': 1,  # tags
+    },
+}
+
+
+def load_commands():
+    # {(module, class): command class}, None if this client does not fit
+    try:
+        from migasfree_client import client, tags
+    except ImportError:
+        return None
+
+    _modules = {'client': client, 'tags': tags}
+    _classes = {}
+    for (_module, _name), _methods in REQUIRED.items():
+        _class = getattr(_modules[_module], _name, None)
+        if _class is None:
+            return None
+
+        for _method, _arguments in _methods.items():
+            try:
+                _spec = inspect.getargspec(getattr(_class, _method))
+            except (AttributeError, TypeError):
+                return None
+            _maximum = len(_spec.args) - 1
+            _minimum = _maximum - len(_spec.defaults or ())
+            if _arguments < _minimum \
+                    or (_arguments > _maximum and not _spec.varargs):
+                return None
+
+        _classes[(_module, _name)] = _class
+
+    return _classes
+
+
+def exit_code(code):
+    # as the interpreter would for SystemExit(code)
+    if code is None:
+        return os.EX_OK
+    if isinstance(code, int):
+        return code
+
+    print(code)
+    return 1
+
+
+# runs the steps of one provisioning, recording each one in events
+class Provision(object):
+    def __init__(self, classes, events=None):
+        self.events = events
+
+        # one configuration read and one server session...
+        self.client = classes[('client', 'MigasFreeClient')]()
+        if getattr(self.client, '_url_request', None) is None:
+            self.client._init_url_request()
+
+        # ...shared by the tags command
+        _class = classes[('tags', 'MigasFreeTags')]
+        self.tags = _class.__new__(_class)
+        self.tags.__dict__.update(self.client.__dict__)
+
+    def step(self, phase, method, *args):
+        _start = time.time()
+        try:
+            _code = 1 if method(*args) is False else os.EX_OK
+        except SystemExit as e:
+            _code = exit_code(e.code)
+        except Exception as e:  # reported as the step result, the rest go on
+            print('%s: %s: %s' % (phase, e.__class__.__name__, e))
+            _code = os.EX_SOFTWARE
+        finally:
+            sys.stdout.flush()
+        _end = time.time()
+
+        self.record(phase, _start, _end, _code)
+        print('Step %s: %.2f s, exit code %d' % (phase, _end - _start, _code))
+
+        return _code
+
+    def record(self, phase, start, end, code):
+        # the same raw events as the launcher, folded by it at the end
+        if not self.events:
+            return
+
+        try:
+            with open(self.events, 'a') as _handle:
+                _handle.write(json.dumps({
+                    'phase': phase,
+                    'start': start,
+                    'end': end,
+                    'exit_code': code,
+                }) + '\n')
+        except (IOError, OSError):
+            pass
+
+    def run(self, tags, force_upgrade=False):
+        # the same markers as the launcher, for the indicator progress
+        self.step('register', self.client._auto_register)
+
+        print('Report tags: %s' % ' '.join(tags))
+        self.step('tags', self.tags._set_tags, tags)
+
+        print(SEPARATOR)
+        print('Synchronizing...')
+        if force_upgrade:
+            self.client._force_upgrade = True
+        _code = self.step('update', self.client._update_system)
+        print(SEPARATOR)
+
+        return _code
+
+
+def main():
+    parser = optparse.OptionParser(
+        usage='%prog [--force-upgrade] [--events FILE] [TAG...]'
+    )
+    parser.add_option('--force-upgrade', action='store_true', default=False)
+    parser.add_option('--events', default='')
+    options, arguments = parser.parse_args()
+
+    _classes = load_commands()
+    if _classes is None:
+        sys.exit(UNAVAILABLE)
+
+    # nothing has run yet: the launcher can still use the commands
+    try:
+        _provision = Provision(_classes, options.events)
+    except (SystemExit, Exception) as e:
+        print('Provision: %s: %s' % (e.__class__.__name__, e))
+        sys.exit(UNAVAILABLE)
+
+    sys.exit(_provision.run(arguments, options.force_upgrade))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 migasfree team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from gi.repository import Gio, GLib
+
+DBUS_NAME = 'org.freedesktop.DBus'
+DBUS_PATH = '/org/freedesktop/DBus'
+
+# in order of preference:
+# (bus name, object path, interface, method, signature, arguments)
+BACKENDS = (
+    (
+        'org.freedesktop.login1',
+        '/org/freedesktop/login1',
+        'org.freedesktop.login1.Manager',
+        'Reboot',
+        '(b)', (True,)  # interactive: polkit may ask for a password
+    ),
+    (
+        'org.freedesktop.ConsoleKit',
+        '/org/freedesktop/ConsoleKit/Manager',
+        'org.freedesktop.ConsoleKit.Manager',
+        'Restart',
+        None, None
+    ),
+    (
+        'org.freedesktop.systemd1',
+        '/org/freedesktop/systemd1',
+        'org.freedesktop.systemd1.Manager',
+        'Reboot',
+        None, None
+    ),
+)
+
+CALL_FLAGS = getattr(
+    Gio.DBusCallFlags,
+    'ALLOW_INTERACTIVE_AUTHORIZATION',
+    Gio.DBusCallFlags.NONE
+)
+
+
+# asks the session manager of the system bus for a restart, with no helper
+# process: the backend is detected once and kept for later calls
+# connection can be replaced by another bus (tests)
+class RebootBackend(object):
+    def __init__(self, connection=None):
+        self._connection = connection
+        self._backend = None
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            self._connection = Gio.bus_get_sync(Gio.BusType.SYSTEM, None)
+
+        return self._connection
+
+    def list_names(self, method):
+        return self.connection.call_sync(
+            DBUS_NAME, DBUS_PATH, DBUS_NAME, method,
+            None, GLib.VariantType.new('(as)'),
+            Gio.DBusCallFlags.NONE, -1, None
+        ).unpack()[0]
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            # running or bus activatable
+            _names = set(self.list_names('ListNames'))
+            _names.update(self.list_names('ListActivatableNames'))
+
+            for _backend in BACKENDS:
+                if _backend[0] in _names:
+                    self._backend = _backend
+                    break
+
+        return self._backend
+
+    def reboot(self, on_error=None):
+        # asynchronous: the authorization dialog may take a while
+        # on_error(message) is called if the restart was not accepted
+        try:
+            _backend = self.backend
+        except GLib.Error as e:
+            if on_error:
+                on_error(e.message)
+            return
+
+        if _backend is None:
+            if on_error:
+                on_error('no session manager found on the system bus')
+            return
+
+        _name, _path, _interface, _method, _signature, _arguments = _backend
+        self.connection.call(
+            _name, _path, _interface, _method,
+            GLib.Variant(_signature, _arguments) if _signature else None,
+            None, CALL_FLAGS, -1, None,
+            self.on_reply, on_error
+        )
+
+    def on_reply(self, connection, result, on_error):
+        try:
+            connection.call_finish(result)
+        except GLib.Error as e:
+            if on_error:
+                on_error(e.message)
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 migasfree team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import fcntl
+import errno
+import subprocess
+
+from gi.repository import GLib
+
+READ_SIZE = 64 * 1024  # bytes
+
+
+# a command whose output is read without blocking (same interface as
+# helper.HelperJob)
+class ProcessJob(object):
+    def __init__(self, command):
+        self.eof = False
+
+        self._process = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            close_fds=True
+        )
+
+        _fd = self.fileno()
+        fcntl.fcntl(_fd, fcntl.F_SETFL, fcntl.fcntl(_fd, fcntl.F_GETFL) | os.O_NONBLOCK)
+
+    def fileno(self):
+        return self._process.stdout.fileno()
+
+    def read(self):
+        try:
+            _data = os.read(self.fileno(), READ_SIZE)
+        except OSError as e:
+            if e.errno in (errno.EAGAIN, errno.EINTR):
+                return ''
+            _data = ''
+
+        if not _data:
+            self.eof = True
+
+        return _data
+
+    def close(self):
+        self._process.stdout.close()
+
+        return self._process.wait()
+
+
+# drives a job from the main loop, with no thread: on_output(data) gets
+# every chunk read (up to READ_SIZE per wakeup) and on_exit(returncode)
+# is called once the job has finished
+class Runner(object):
+    def __init__(self, job, on_output, on_exit):
+        self._job = job
+        self._on_output = on_output
+        self._on_exit = on_exit
+
+        self._source_id = GLib.io_add_watch(
+            job.fileno(),
+            GLib.PRIORITY_DEFAULT,
+            GLib.IO_IN | GLib.IO_HUP | GLib.IO_ERR,
+            self._on_ready
+        )
+
+    def _on_ready(self, fd, condition):
+        if condition & GLib.IO_IN:
+            _data = self._job.read()
+            if _data:
+                self._on_output(_data)
+
+            if not self._job.eof:
+                return True
+        elif not condition & (GLib.IO_HUP | GLib.IO_ERR):
+            return True
+
+        self._source_id = 0
+        self._on_exit(self._job.close())
+
+        return False
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 migasfree team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import math
+import time
+import errno
+import random
+
+from gi.repository import GObject
+
+STATE_FILE = os.path.join(
+    os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')),
+    'migasfree-indicator',
+    'last-sync'
+)
+
+RETRY_DELAY = 5 * 60  # seconds, doubled after every consecutive failure
+MAX_WAKEUP = 15 * 60  # seconds, wall clock is checked again (suspend)
+DEFER_DELAY = 15 * 60  # seconds, a deferred sync is due again
+
+
+def next_due(now, last_sync, interval, splay, rng=random):
+    # never synced, overdue or clock went backwards: somewhere in the splay
+    if last_sync is None or last_sync > now \
+            or last_sync + interval <= now:
+        return now + rng.uniform(0, splay)
+
+    return last_sync + interval
+
+
+def retry_delay(failures, interval, rng=random):
+    _backoff = min(RETRY_DELAY * 2 ** (failures - 1), interval)
+
+    return _backoff / 2.0 + rng.uniform(0, _backoff / 2.0)
+
+
+def is_server_failure(returncode):
+    return returncode == errno.ECONNREFUSED
+
+
+# decides when the next scheduled sync is due:
+#  * a random splay spreads clients that start at the same time
+#  * the last sync that reached the server is persisted, so a restart
+#    waits for the rest of the interval instead of syncing again
+#  * refused connections are retried with jittered exponential backoff
+#  * due times are wall clock, checked at least every MAX_WAKEUP, so that
+#    a sync missed during suspend is caught up soon after resume
+class SyncScheduler(object):
+    def __init__(self, callback, interval, splay, state_file=STATE_FILE):
+        self._callback = callback
+        self.interval = interval  # seconds
+        self.splay = splay  # seconds
+        self._state_file = state_file
+
+        self.failures = 0
+        self.last_sync = self.load()
+        self.due = None
+        self._timer_id = 0
+
+    def load(self):
+        try:
+            with open(self._state_file) as _handle:
+                return float(_handle.read().strip())
+        except (IOError, OSError, ValueError):
+            return None
+
+    def save(self):
+        try:
+            if not os.path.isdir(os.path.dirname(self._state_file)):
+                os.makedirs(os.path.dirname(self._state_file))
+            with open(self._state_file + '.tmp', 'w') as _handle:
+                _handle.write('%f\n' % self.last_sync)
+            os.rename(self._state_file + '.tmp', self._state_file)
+        except (IOError, OSError):
+            pass
+
+    def start(self):
+        self.due = next_due(
+            time.time(), self.last_sync, self.interval, self.splay
+        )
+        self._arm()
+
+    def stop(self):
+        if self._timer_id:
+            GObject.source_remove(self._timer_id)
+            self._timer_id = 0
+
+    def set_interval(self, interval):
+        self.interval = interval
+        if self._timer_id and not self.failures:
+            self.start()
+
+    def finished(self, returncode):
+        _now = time.time()
+
+        if is_server_failure(returncode):
+            self.failures += 1
+            self.due = _now + retry_delay(self.failures, self.interval)
+        else:
+            self.failures = 0
+            self.last_sync = _now
+            self.save()
+            self.due = _now + self.interval
+
+        self._arm()
+
+    def defer(self):
+        # the callback declined to sync now (on battery, metered network)
+        self.due = time.time() + DEFER_DELAY
+        self._arm()
+
+    def _arm(self):
+        self.stop()
+
+        _delay = max(0, int(math.ceil(self.due - time.time())))
+        self._timer_id = GObject.timeout_add_seconds(
+            min(_delay, MAX_WAKEUP),
+            self._on_timer
+        )
+
+    def _on_timer(self):
+        self._timer_id = 0
+
+        # second timeouts may fire up to one second early
+        if time.time() >= self.due - 1:
+            self._callback()
+        else:
+            self._arm()
+
+        return False
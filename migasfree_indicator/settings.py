@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 migasfree team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from gi.repository import Gio, GObject
+
+from .policy import CONF_FILE, read_options
+from .watcher import FileWatcher
+
+SCHEMA = "org.migasfree.console"
+SHOW_CONSOLE = "show-console"
+
+DEFAULT_INTERVAL = 24  # hours
+DEFAULT_SPLAY = 30  # minutes
+DEFAULT_SCROLLBACK_LINES = 10000
+
+
+def to_bool(value):
+    if isinstance(value, bool):
+        return value
+
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+# conf file key: (type, default)
+OPTIONS = {
+    'force_upgrade': (to_bool, False),
+    'interval': (int, DEFAULT_INTERVAL),
+    'splay': (int, DEFAULT_SPLAY),
+    'support': (str, ''),
+    'scrollback_lines': (int, DEFAULT_SCROLLBACK_LINES),
+    'scrollback_bytes': (int, 0),
+    'defer_on_battery': (to_bool, False),
+    'defer_on_metered': (to_bool, False),
+}
+
+
+def read_config(path=CONF_FILE):
+    return read_options(OPTIONS, path)
+
+
+# created once: show-console lives in GSettings (read on first use), the
+# rest starts from the command line options and follows later edits of
+# the conf file
+# emits 'changed' with the option name whenever a value changes
+class Settings(GObject.GObject):
+    __gsignals__ = {
+        'changed': (GObject.SignalFlags.RUN_FIRST, None, (str,)),
+    }
+
+    def __init__(self, options):
+        super(Settings, self).__init__()
+
+        self._config = read_config()
+        # options missing from the command line come from the conf file
+        self._values = dict(
+            (_key, getattr(options, _key, self._config[_key]))
+            for _key in OPTIONS
+        )
+
+        # only the GUI needs GSettings (and its schema installed)
+        self._gsettings = None
+        self._show_console = False
+
+        self._watcher = FileWatcher([CONF_FILE], self.on_config_changed)
+        self._watcher.start()
+
+    @property
+    def force_upgrade(self):
+        return self._values['force_upgrade']
+
+    @property
+    def interval(self):
+        return self._values['interval']
+
+    @property
+    def splay(self):
+        return self._values['splay']
+
+    @property
+    def support(self):
+        return self._values['support']
+
+    @property
+    def scrollback_lines(self):
+        return self._values['scrollback_lines']
+
+    @property
+    def scrollback_bytes(self):
+        return self._values['scrollback_bytes']
+
+    @property
+    def defer_on_battery(self):
+        return self._values['defer_on_battery']
+
+    @property
+    def defer_on_metered(self):
+        return self._values['defer_on_metered']
+
+    @property
+    def show_console(self):
+        if self._gsettings is None:
+            self._gsettings = Gio.Settings.new(SCHEMA)
+            self._gsettings.connect(
+                'changed::%s' % SHOW_CONSOLE,
+                self.on_show_console_changed
+            )
+            # GSettings only notifies changes of keys already read
+            self._show_console = self._gsettings.get_boolean(SHOW_CONSOLE)
+
+        return self._show_console
+
+    @show_console.setter
+    def show_console(self, value):
+        if value != self.show_console:
+            self._show_console = value
+            self._gsettings.set_boolean(SHOW_CONSOLE, value)
+
+    def on_show_console_changed(self, settings, key):
+        self._show_console = settings.get_boolean(key)
+        self.emit('changed', 'show_console')
+
+    def on_config_changed(self, path):
+        _config = read_config()
+        _changed = [
+            _key for _key in OPTIONS if _config[_key] != self._config[_key]
+        ]
+        self._config = _config
+
+        for _key in _changed:
+            self._values[_key] = _config[_key]
+            self.emit('changed', _key)
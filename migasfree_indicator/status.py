@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 migasfree team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Sync state on the session bus, for monitoring scripts, login hooks or
+# helpdesk tools, answered from the engine state in memory:
+#
+#   gdbus call --session --dest org.migasfree.Indicator \
+#       --object-path /org/migasfree/Indicator \
+#       --method org.freedesktop.DBus.Properties.GetAll \
+#       org.migasfree.Indicator1
+#
+# Properties (PropertiesChanged is emitted when they change):
+#   State          'idle' or 'upgrading'
+#   LastExitCode   of the last sync, -1 if none yet
+#   LastStatus     that exit code as shown by the tray icon ('idle',
+#                  'warning' or 'error'), '' if none yet
+#   LastSync       time of the last sync that reached the server, 0 never
+#   RebootPending  a restart is needed to finish updating
+#   Queued         a sync is waiting for the running one
+# Methods:
+#   Sync(force) -> 'started', 'queued', 'merged' or 'covered' (jobs.py)
+#   Cancel() -> whether a queued sync was cancelled
+
+from gi.repository import Gio, GLib
+
+from .engine import get_status
+
+BUS_NAME = 'org.migasfree.Indicator'
+OBJECT_PATH = '/org/migasfree/Indicator'
+INTERFACE = 'org.migasfree.Indicator1'
+PROPERTIES_INTERFACE = 'org.freedesktop.DBus.Properties'
+
+STATE_IDLE = 'idle'
+STATE_UPGRADING = 'upgrading'
+
+INTROSPECTION = '''
+<node>
+  <interface name="%s">
+    <method name="Sync">
+      <arg name="force" type="b" direction="in"/>
+      <arg name="result" type="s" direction="out"/>
+    </method>
+    <method name="Cancel">
+      <arg name="cancelled" type="b" direction="out"/>
+    </method>
+    <property name="State" type="s" access="read"/>
+    <property name="LastExitCode" type="i" access="read"/>
+    <property name="LastStatus" type="s" access="read"/>
+    <property name="LastSync" type="x" access="read"/>
+    <property name="RebootPending" type="b" access="read"/>
+    <property name="Queued" type="b" access="read"/>
+  </interface>
+</node>
+''' % INTERFACE
+
+# property: signature
+SIGNATURES = {
+    'State': 's',
+    'LastExitCode': 'i',
+    'LastStatus': 's',
+    'LastSync': 'x',
+    'RebootPending': 'b',
+    'Queued': 'b',
+}
+
+
+# owns BUS_NAME while the engine lives; if another indicator of the same
+# session already has it, this one just stays off the bus
+class StatusService(object):
+    def __init__(self, engine):
+        self.engine = engine
+        self.connection = None
+        self.properties = self.read()
+
+        self._registration_id = 0
+        self._owner_id = Gio.bus_own_name(
+            Gio.BusType.SESSION,
+            BUS_NAME,
+            Gio.BusNameOwnerFlags.NONE,
+            self.on_bus_acquired,
+            None,
+            self.on_name_lost
+        )
+
+        for _signal in ('started', 'finished', 'reboot-required',
+                        'queue-changed'):
+            engine.connect(_signal, self.on_engine_changed)
+
+    def read(self):
+        _engine = self.engine
+        _return_code = _engine.return_code
+
+        return {
+            'State': STATE_UPGRADING if _engine.is_upgrading else STATE_IDLE,
+            'LastExitCode': -1 if _return_code is None else _return_code,
+            'LastStatus': '' if _return_code is None
+            else get_status(_return_code),
+            'LastSync': int(_engine.scheduler.last_sync or 0),
+            'RebootPending': _engine.reboot_pending,
+            'Queued': _engine.queue.pending is not None,
+        }
+
+    def on_bus_acquired(self, connection, name):
+        self.connection = connection
+        self._registration_id = connection.register_object(
+            OBJECT_PATH,
+            Gio.DBusNodeInfo.new_for_xml(INTROSPECTION).interfaces[0],
+            self.on_method_call,
+            self.on_get_property,
+            None
+        )
+
+    def on_name_lost(self, connection, name):
+        if self._registration_id:
+            connection.unregister_object(self._registration_id)
+            self._registration_id = 0
+        self.connection = None
+
+    def on_get_property(self, connection, sender, path, interface, name):
+        return GLib.Variant(SIGNATURES[name], self.properties[name])
+
+    def on_method_call(self, connection, sender, path, interface, method,
+                       parameters, invocation):
+        if method == 'Sync':
+            if parameters.unpack()[0]:
+                _result = self.engine.force_upgrade()
+            else:
+                _result = self.engine.upgrade()
+            invocation.return_value(GLib.Variant('(s)', (_result,)))
+        elif method == 'Cancel':
+            _cancelled = self.engine.queue.pending is not None
+            self.engine.cancel()
+            invocation.return_value(GLib.Variant('(b)', (_cancelled,)))
+
+    def on_engine_changed(self, engine, *args):
+        _properties = self.read()
+        _changed = dict(
+            (_name, GLib.Variant(SIGNATURES[_name], _value))
+            for _name, _value in _properties.items()
+            if _value != self.properties[_name]
+        )
+        self.properties = _properties
+
+        if _changed and self.connection and self._registration_id:
+            self.connection.emit_signal(
+                None,
+                OBJECT_PATH,
+                PROPERTIES_INTERFACE,
+                'PropertiesChanged',
+                GLib.Variant('(sa{sv}as)', (INTERFACE, _changed, []))
+            )
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 migasfree team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import re
+import codecs
+import locale
+
+# everything a terminal would interpret instead of printing, in one pass
+_TERMINAL_SEQUENCES = re.compile(
+    r'^[^\n]*\r(?!\n)'  # line redrawn with carriage returns: keep last state
+    r'|\r(?=\n)'  # CRLF line endings
+    r'|\x1b7[^\n]*?\x1b8'  # status line drawn between cursor save/restore
+    r'|\x1b\[[0-?]*[ -/]*[@-~]'  # CSI: SGR colors, cursor movement, ...
+    r'|\x1b\][^\x07\x1b\n]*(?:\x07|\x1b\\)?'  # OSC, ended by BEL or ST
+    r'|\x1b[ -/]*[0-~]'  # two bytes and charset selection sequences
+    r'|\x1b'  # truncated sequence
+    r'|[\x00-\x08\x0b\x0c\x0e-\x1a\x1c-\x1f\x7f]',  # other control chars
+    re.MULTILINE
+)
+
+
+def clean_text(text):
+    return _TERMINAL_SEQUENCES.sub('', text)
+
+
+# cleans a byte stream chunk by chunk: only complete lines are emitted, so
+# sequences and carriage return redraws split between chunks are handled
+# the incomplete last line is kept collapsed to its latest redraw
+class TerminalFilter(object):
+    def __init__(self):
+        self._pending = ''
+
+    def feed(self, data):
+        _data = self._pending + data
+        _end = _data.rfind('\n') + 1
+
+        _tail = _data[_end:]
+        _redraw = _tail.rfind('\r', 0, len(_tail) - 1)
+        if _redraw >= 0:
+            _tail = _tail[_redraw + 1:]
+        self._pending = _tail
+
+        return clean_text(_data[:_end])
+
+    def flush(self):
+        _data = self._pending.rstrip('\r')
+        self._pending = ''
+
+        return clean_text(_data)
+
+
+# decodes the output in the locale encoding as it arrives, so characters
+# split between chunks are kept, and returns UTF-8 ready for Gtk widgets
+# invalid bytes are replaced instead of breaking the whole chunk
+class TextDecoder(object):
+    def __init__(self, encoding=None):
+        self.encoding = encoding or locale.getpreferredencoding() or 'utf-8'
+        try:
+            # UTF-8 is a superset of ASCII (C locale, as under systemd)
+            if codecs.lookup(self.encoding).name == 'ascii':
+                self.encoding = 'utf-8'
+        except LookupError:
+            self.encoding = 'utf-8'
+
+        self._decoder = codecs.getincrementaldecoder(self.encoding)('replace')
+
+    def feed(self, data, final=False):
+        if not data and not final:
+            return ''
+
+        return self._decoder.decode(data, final).encode('utf-8')
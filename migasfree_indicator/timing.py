@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 migasfree team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# startup phases are always recorded (a few tuples); the breakdown is
+# printed with --timing or MIGASFREE_INDICATOR_TIMING=1
+
+import os
+import time
+
+
+def process_start():
+    try:
+        with open('/proc/self/stat') as _handle:
+            _ticks = int(_handle.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as _handle:
+            _uptime = float(_handle.read().split()[0])
+    except (IOError, OSError, IndexError, ValueError):
+        return time.time()
+
+    return time.time() - _uptime + float(_ticks) / os.sysconf('SC_CLK_TCK')
+
+
+_marks = [('process start', process_start()), ('interpreter', time.time())]
+enabled = os.environ.get('MIGASFREE_INDICATOR_TIMING', '') not in ('', '0')
+
+
+def mark(phase):
+    _marks.append((phase, time.time()))
+
+
+def report():
+    if not enabled:
+        return
+
+    print('startup timing (seconds):')
+    for (_, _previous), (_phase, _time) in zip(_marks, _marks[1:]):
+        print('  %-20s %.3f' % (_phase, _time - _previous))
+    print('  %-20s %.3f' % ('total', _marks[-1][1] - _marks[0][1]))
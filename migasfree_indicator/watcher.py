@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017 migasfree team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import os
+
+from gi.repository import Gio, GLib, GObject
+
+POLL_INTERVAL = 10  # seconds
+MAX_POLL_INTERVAL = 600  # seconds
+
+
+# calls callback(path) when any of paths is created, changed or removed
+# directories are watched with Gio.FileMonitor (inotify), so nothing wakes
+# up while they are quiet; without file monitoring, paths are polled with
+# an exponential backoff that resets on every change
+class FileWatcher(object):
+    def __init__(self, paths, callback):
+        self.paths = list(paths)
+        self._callback = callback
+
+        self._monitors = []
+        self._snapshot = {}
+        self._interval = POLL_INTERVAL
+        self._poll_id = 0
+
+    def start(self):
+        try:
+            for _directory in set(os.path.dirname(_path) for _path in self.paths):
+                _monitor = Gio.File.new_for_path(_directory).monitor_directory(
+                    Gio.FileMonitorFlags.NONE,
+                    None
+                )
+                _monitor.connect('changed', self.on_changed)
+                self._monitors.append(_monitor)
+        except GLib.Error:
+            self.stop()
+            self._start_polling()
+
+    def stop(self):
+        for _monitor in self._monitors:
+            _monitor.cancel()
+        self._monitors = []
+
+        if self._poll_id:
+            GObject.source_remove(self._poll_id)
+            self._poll_id = 0
+
+    def on_changed(self, monitor, file_, other_file, event_type):
+        if event_type not in (
+            Gio.FileMonitorEvent.CREATED,
+            Gio.FileMonitorEvent.DELETED,
+            Gio.FileMonitorEvent.CHANGES_DONE_HINT,
+        ):
+            return
+
+        if file_.get_path() in self.paths:
+            self._callback(file_.get_path())
+
+    def _stat(self):
+        _snapshot = {}
+        for _path in self.paths:
+            try:
+                _snapshot[_path] = os.stat(_path).st_mtime
+            except OSError:
+                _snapshot[_path] = None
+
+        return _snapshot
+
+    def _start_polling(self):
+        self._snapshot = self._stat()
+        self._interval = POLL_INTERVAL
+        self._poll_id = GObject.timeout_add_seconds(self._interval, self._poll)
+
+    def _poll(self):
+        _snapshot = self._stat()
+        _changed = [
+            _path for _path in self.paths
+            if _snapshot[_path] != self._snapshot[_path]
+        ]
+        self._snapshot = _snapshot
+
+        if _changed:
+            self._interval = POLL_INTERVAL
+        else:
+            self._interval = min(self._interval * 2, MAX_POLL_INTERVAL)
+        self._poll_id = GObject.timeout_add_seconds(self._interval, self._poll)
+
+        for _path in _changed:
+            self._callback(_path)
+
+        return False
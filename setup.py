@@ -108,6 +108,9 @@ setup(
         ('share/glib-2.0/schemas', ['data/org.migasfree.tray.gschema.xml']),
         ('/etc', ['data/migasfree-indicator.conf']),
         ('/etc/sudoers.d', ['data/sudo/migasfree-launcher']),
+        ('/lib/systemd/system', [
+            'data/systemd/migasfree-launcher-helper.service',
+        ]),
     ],
     scripts=[
         'bin/migasfree-launcher',
@@ -137,7 +140,12 @@ setup(
     ],
     entry_points = {
         'console_scripts': [
-            'migasfree-indicator=migasfree_indicator.command_line:main'
+            'migasfree-indicator=migasfree_indicator.command_line:main',
+            'migasfree-launcher-helper=migasfree_indicator.helper:main',
+            'migasfree-launcher-hooks=migasfree_indicator.hooks:main',
+            'migasfree-launcher-metrics=migasfree_indicator.metrics:main',
+            'migasfree-launcher-preflight=migasfree_indicator.preflight:main',
+            'migasfree-launcher-provision=migasfree_indicator.provision:main',
         ],
     },
 )